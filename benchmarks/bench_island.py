@@ -0,0 +1,196 @@
+#! /usr/bin/env python
+
+"""
+Benchmarks of simulated island years.
+
+Sweeps map size, animal density and species mix, for both population backends,
+and reports animals per second and the cost of each phase per animal.
+Phases are timed by the ``PhaseProfiler`` of the island, see the profiling documentation.
+The census, ``BioSim.snapshot``, is timed as its own phase.
+
+Examples, run from the root of the repository::
+
+    python benchmarks/bench_island.py --quick
+    python benchmarks/bench_island.py --save benchmarks/baseline.json
+    python benchmarks/bench_island.py --compare benchmarks/baseline.json
+
+With ``--compare``, every case and phase more than ``--tolerance`` slower than the baseline
+is listed, and the script exits with status 1.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import platform
+import sys
+from time import perf_counter
+
+from biosim.simulation import BioSim
+from humans.parameters import default_human_parameters
+
+# Each case is named size-density-mix-backend, e.g. '20x20-h10-hc-arrays'
+MAP_SIZES = (10, 20, 40)
+HERBIVORE_DENSITIES = (5, 20)
+# Animals of each species per herbivore placed on a cell
+SPECIES_MIXES = {'h': {},
+                 'hc': {'Carnivore': 0.25},
+                 'hch': {'Carnivore': 0.25, 'Human': 0.1}}
+BACKENDS = ('objects', 'arrays')
+QUICK = dict(sizes=(10,), densities=(10,), mixes=('hc', 'hch'))
+
+PHASES = ('feeding', 'breeding', 'migration', 'arrival', 'end_of_year', 'census')
+AGES = {'Herbivore': 5, 'Carnivore': 5, 'Human': 20}
+WEIGHTS = {'Herbivore': 20, 'Carnivore': 20, 'Human': 40}
+
+
+def make_map(size):
+    """ :returns: A square island map string with a water border and mixed land types. """
+    land = 'LLHD'
+    rows = ['W' * size]
+    for row in range(1, size - 1):
+        rows.append('W' + ''.join(land[(row + col) % len(land)]
+                                  for col in range(1, size - 1)) + 'W')
+    rows.append('W' * size)
+    return '\n'.join(rows)
+
+
+def make_population(size, density, mix):
+    """ :returns: An initial population with animals on every land cell. """
+    counts = {'Herbivore': density}
+    counts.update({species: max(1, round(density * ratio))
+                   for species, ratio in SPECIES_MIXES[mix].items()})
+    animals = [{'species': species, 'age': AGES[species], 'weight': WEIGHTS[species]}
+               for species, count in counts.items() for _ in range(count)]
+    return [{'loc': (row, col), 'pop': animals}
+            for row in range(2, size) for col in range(2, size)]
+
+
+def make_sim(size, density, mix, backend, seed):
+    """ :returns: A headless ``BioSim`` populated for the case. """
+    sim = BioSim(make_map(size), [], seed=seed, vis_years=0, backend=backend)
+    if 'Human' in SPECIES_MIXES[mix]:
+        # Copies stay compiled, so all humans share them like the other species
+        sim.animal_parameters.update({species: para.copy()
+                                      for species, para in default_human_parameters.items()})
+    sim.add_population(make_population(size, density, mix))
+    return sim
+
+
+def run_case(size, density, mix, backend, years, warmup, seed):
+    """
+    Simulates ``warmup`` years untimed, then profiles ``years`` years.
+
+    :returns: Dict with seconds per year, animals per second
+              and microseconds per animal for each phase.
+    """
+    sim = make_sim(size, density, mix, backend, seed)
+    sim.simulate(warmup)
+    profiler = sim.enable_profiling()
+
+    animal_years = 0
+    census = 0.0
+    start = perf_counter()
+    for _ in range(years):
+        animal_years += sim.num_animals
+        sim.simulate(1)
+        census_start = perf_counter()
+        sim.snapshot()
+        census += perf_counter() - census_start
+    seconds = perf_counter() - start
+
+    phase_seconds = profiler.totals()
+    phase_seconds['census'] = census
+    animal_years = max(animal_years, 1)
+    return {'seconds_per_year': seconds / years,
+            'animals_per_second': animal_years / seconds,
+            'final_animals': sim.num_animals,
+            'phase_us_per_animal': {phase: 1e6 * phase_seconds[phase] / animal_years
+                                    for phase in PHASES}}
+
+
+def run_suite(sizes, densities, mixes, backends, years, warmup, seed):
+    """ :returns: Dict of results for every case in the sweep. """
+    results = {}
+    for size, density, mix, backend in itertools.product(sizes, densities, mixes, backends):
+        name = f'{size}x{size}-h{density}-{mix}-{backend}'
+        results[name] = run_case(size, density, mix, backend, years, warmup, seed)
+        print(report_line(name, results[name]), flush=True)
+    return results
+
+
+def report_line(name, result):
+    phases = ' '.join(f'{result["phase_us_per_animal"][phase]:7.2f}' for phase in PHASES)
+    return (f'{name:28s} {result["seconds_per_year"]:8.4f} {result["animals_per_second"]:10.0f}'
+            f' {phases}')
+
+
+def report_header():
+    phases = ' '.join(f'{phase[:7]:>7s}' for phase in PHASES)
+    return (f'{"case":28s} {"s/year":>8s} {"animals/s":>10s} {phases}\n'
+            f'{"":49s} (microseconds per animal and year)')
+
+
+def compare(results, baseline, tolerance):
+    """
+    :returns: List of messages for every case and phase
+              more than ``tolerance`` (a fraction) slower than in the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        if result['animals_per_second'] < old['animals_per_second'] / (1 + tolerance):
+            regressions.append(f'{name}: {result["animals_per_second"]:.0f} animals/s, '
+                               f'baseline {old["animals_per_second"]:.0f}')
+        for phase in PHASES:
+            new_cost = result['phase_us_per_animal'][phase]
+            old_cost = old['phase_us_per_animal'].get(phase)
+            if old_cost and new_cost > old_cost * (1 + tolerance):
+                regressions.append(f'{name} {phase}: {new_cost:.2f} us/animal, '
+                                   f'baseline {old_cost:.2f}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--quick', action='store_true', help='run a small sweep only')
+    parser.add_argument('--backend', choices=BACKENDS, action='append',
+                        help='backend to run, may be repeated (default: all)')
+    parser.add_argument('--years', type=int, default=10, help='years timed per case')
+    parser.add_argument('--warmup', type=int, default=3, help='years simulated before timing')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', metavar='FILE', help='store the results as a baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare with a stored baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown against the baseline (default: 0.2)')
+    args = parser.parse_args(argv)
+    # The yearly count logging of BioSim is not part of what we measure
+    logging.disable(logging.INFO)
+
+    sweep = QUICK if args.quick else dict(sizes=MAP_SIZES, densities=HERBIVORE_DENSITIES,
+                                          mixes=tuple(SPECIES_MIXES))
+    print(report_header())
+    results = run_suite(backends=args.backend or BACKENDS, years=args.years,
+                        warmup=args.warmup, seed=args.seed, **sweep)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'years': args.years, 'warmup': args.warmup, 'seed': args.seed,
+                       'results': results}, file, indent=1)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+        if regressions := compare(results, baseline, args.tolerance):
+            print('\nSlower than baseline:')
+            print('\n'.join(regressions))
+            return 1
+        print('\nNo regressions against baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,28 +1,40 @@
-import random
 import math
+import numpy as np
+from .fitness import fitness
+from .randomness import default_rng
 
 
 class Animal:
     """
     Abstract class representing an animal.
     Has methods for simulating the different phases of the year, see the :ref:`front page<index>`.
+
+    Animals keep their state in ``__slots__``, without a ``__dict__`` per animal.
+    The name of the species is a class attribute of each subclass, and the parameters
+    are a reference to the dict shared by all animals of the species.
     """
 
-    def __init__(self, species, age, weight, parameters):
+    __slots__ = ('_age', '_weight', '_calculated_fitness', 'para')
+
+    # Name of the species, set by each subclass
+    species = None
+
+    def __init__(self, age, weight, parameters):
         """
-        :param species: Name of the species
-        :type species: str
         :param age: Age of animal
         :type age: int
         :param weight: Weight of animal
         :type weight: float
-        :param parameters: Valid parameter specification for the given species
-        :type parameters: dict
+        :param parameters: Valid parameter specification for the given species,
+                           compiled by ``compile_animal_parameters``.
+                           Shared by all animals of the species.
+        :type parameters: SpeciesParameters
         """
         if age < 0 or weight <= 0:
             raise ValueError("Invalid starting conditions of an animal")
+        if not hasattr(parameters, 'birth_weight_min'):
+            raise TypeError("Animal parameters must be compiled, see compile_animal_parameters")
 
-        self.species = species
         self._age = age
         self._weight = weight
         self._calculated_fitness = None
@@ -45,13 +57,34 @@ class Animal:
             if self._weight <= 0:
                 self._calculated_fitness = 0
             else:
-                exp_age = self.para['phi_age'] * (self._age - self.para['a_half'])
-                exp_weight = -self.para['phi_weight'] * (self._weight - self.para['w_half'])
+                exp_age = self.para.phi_age * (self._age - self.para.a_half)
+                exp_weight = -self.para.phi_weight * (self._weight - self.para.w_half)
                 q_plus = 1 / (1 + math.exp(exp_age))
                 q_minus = 1 / (1 + math.exp(exp_weight))
                 self._calculated_fitness = q_plus * q_minus
         return self._calculated_fitness
 
+    @staticmethod
+    def refresh_fitness(animals):
+        """
+        :param animals: Iterable of animals, possibly of different species
+
+        Batched version of ``fitness``. Calculates the fitness of every animal whose cached value
+        was cleared by a change of age or weight, in one vectorized pass per species.
+        Animals with a valid cached value are skipped, and later reads of ``fitness`` are free.
+        """
+        dirty = {}
+        for a in animals:
+            if a._calculated_fitness is None:
+                dirty.setdefault(id(a.para), []).append(a)
+
+        for group in dirty.values():
+            values = fitness(group[0].para,
+                             np.array([a._age for a in group]),
+                             np.array([a._weight for a in group], dtype=float))
+            for a, value in zip(group, values.tolist()):
+                a._calculated_fitness = value
+
     @property
     def eating_priority(self):
         """
@@ -60,16 +93,28 @@ class Animal:
         """
         raise NotImplementedError
 
+    @classmethod
+    def eating_priorities(cls, fitness):
+        """
+        :param fitness: Array with the fitness of animals of this species
+
+        Vectorized ``eating_priority``, used by the array backend, see :ref:`population`.
+
+        :returns: Array with the eating priority of each animal
+        """
+        raise NotImplementedError
+
     @property
     def is_prey(self):
         """ Determines if the animal can be eaten by other animals """
-        return self.para['prey']
+        return self.para.prey
 
     # 1. feeding
-    def feed(self, fodder, prey_list):
+    def feed(self, fodder, prey_list, rng=None):
         """
         :param fodder: The amount of plant fodder available to eat
-        :param prey_list: A list of all prey animals in the cell
+        :param prey_list: A ``PreyIndex`` (or list) of all prey animals in the cell
+        :param rng: ``numpy.random.Generator`` for random events while eating
 
         :returns: the amount of fodder consumed
 
@@ -77,10 +122,48 @@ class Animal:
         """
         raise NotImplementedError
 
+    @classmethod
+    def feed_animals(cls, para, animals, fodder, prey_list, rng=None):
+        """
+        :param para: Parameters of this species
+        :param animals: List of animals of this species, in eating order
+        :param fodder: The amount of plant fodder available to eat
+        :param prey_list: A ``PreyIndex`` of all prey animals in the cell
+        :param rng: ``numpy.random.Generator`` for random events while eating
+
+        Feeds a run of animals of one species, used by ``Landscape.animal_feeding``.
+        Calls ``feed`` for each animal in turn, species can do the same in bulk.
+
+        :returns: the amount of fodder left
+        """
+        for animal in animals:
+            fodder -= animal.feed(fodder, prey_list, rng)
+            if animal.is_prey:
+                prey_list.invalidate()  # Eating changed its fitness
+        return fodder
+
+    @classmethod
+    def feed_population(cls, para, population, members, fodder, rng):
+        """
+        :param para: Parameters of this species
+        :param population: The ``Population`` of the cell
+        :param members: Indices into ``population`` of the animals to feed, in eating order
+        :param fodder: The amount of plant fodder available to eat
+        :param rng: ``numpy.random.Generator`` for random events while eating
+
+        Vectorized ``feed``, used by the array backend, see :ref:`population`.
+        Prey is found in ``population.prey_table()``, and is informed by marking it as not alive.
+
+        :returns: the amount of fodder consumed
+        """
+        raise NotImplementedError
+
     # 2. procreation
-    def try_give_birth(self, species_count):
+    def try_give_birth(self, species_count, draw=None, normal=None):
         """
         :param species_count: Number of individuals of each species at start of procreation
+        :param draw: Uniform random number in [0, 1), drawn here if not given
+        :param normal: Standard normal random number, drawn here if not given
 
         Animal tries to give birth. Must fit minimum weight criteria:
 
@@ -102,30 +185,49 @@ class Animal:
 
         .. note::
            If the sampled weight is so large that the parent would end up with negative weight,
-           the birth is aborted
+           or is zero or negative, the birth is aborted
 
         :returns: None if no child was born, returns the child if one is born
         """
 
         # We need to be heavy enough to give birth
-        if self.weight < self.para['zeta']*(self.para['w_birth'] + self.para['sigma_birth']):
+        if self.weight < self.para.birth_weight_min:
             return None
 
-        p = min(1.0, self.para['gamma'] * self.fitness * (species_count[self.species] - 1))
-        if random.random() > p:  # Probability 1-p of not giving birth
+        p = min(1.0, self.para.gamma * self.fitness * (species_count[self.species] - 1))
+        if draw is None:
+            draw = default_rng.random()
+        if draw > p:  # Probability 1-p of not giving birth
             return None
 
         # We lose more weight than just the weight of the child
-        birth_weight = random.gauss(self.para['w_birth'], self.para['sigma_birth'])
-        wight_loss = self.para['xi'] * birth_weight
-        if wight_loss < self.weight:
+        if normal is None:
+            normal = default_rng.standard_normal()
+        birth_weight = self.para.w_birth + self.para.sigma_birth * normal
+        wight_loss = self.para.xi * birth_weight
+        if 0 < birth_weight and wight_loss < self.weight:
             self.weight -= wight_loss
-            return self.para['constructor'](0, birth_weight, self.para)
+            return self.para.constructor(0, birth_weight, self.para)
+
+    @classmethod
+    def fertile(cls, para, age, weight):
+        """
+        :param para: Parameters of this species
+        :param age: Array of ages
+        :param weight: Array of weights
+
+        Vectorized minimum weight criteria of ``try_give_birth``, used by the array backend.
+
+        :returns: Boolean array, True for each animal allowed to try giving birth
+        """
+        return weight >= para.birth_weight_min
 
     # 3. migration
-    def try_migrate(self, neighbour_cells):
+    def try_migrate(self, neighbour_cells, draw=None, direction=None):
         """
         :param neighbour_cells: A list of all four neighbour Landscape cells (must not be empty)
+        :param draw: Uniform random number in [0, 1), drawn here if not given
+        :param direction: Random index into ``neighbour_cells``, drawn here if not given
 
         Tries to move to a neighbouring cell.
         The chance of migration is proportional to fitness, as well as random chance:
@@ -137,8 +239,12 @@ class Animal:
         Returns True if animal successfully migrated, and should no longer reside in its original \
         cell.
         """
-        if random.random() < self.para['mu']*self.fitness:
-            return random.choice(neighbour_cells).try_accept_migrating_animal(self)
+        if draw is None:
+            draw = default_rng.random()
+        if draw < self.para.mu*self.fitness:
+            if direction is None:
+                direction = default_rng.integers(len(neighbour_cells))
+            return neighbour_cells[direction].try_accept_migrating_animal(self)
         return False
 
     # 4. ageing
@@ -155,11 +261,13 @@ class Animal:
 
         Call once per year.
         """
-        self.weight -= self.para['eta'] * self.weight
+        self.weight -= self.para.eta * self.weight
 
     # 6. death
-    def death(self):
+    def death(self, draw=None):
         """
+        :param draw: Uniform random number in [0, 1), drawn here if not given
+
         If the animals weight is zero or is unlucky, it dies.
         Chance of death is proportional to (1 - fitness):
 
@@ -169,7 +277,41 @@ class Animal:
 
         :returns: True if dead
         """
-        return self.weight <= 0 or random.random() < self.para['omega']*(1.0 - self.fitness)
+        if draw is None:
+            draw = default_rng.random()
+        return self.weight <= 0 or draw < self.para.omega*(1.0 - self.fitness)
+
+    @staticmethod
+    def end_of_year(animals, draws):
+        """
+        :param animals: List of animals, possibly of different species
+        :param draws: Array with a uniform random number in [0, 1) for each animal
+
+        Batched ``ageing``, ``weight_loss`` and ``death``, in one vectorized pass per species.
+        The fitness after ageing and weight loss is calculated once, and is kept
+        as the cached fitness of the survivors.
+
+        :returns: Boolean array, True for each animal that died
+        """
+        groups = {}
+        for i, a in enumerate(animals):
+            groups.setdefault(id(a.para), []).append(i)
+
+        dead = np.zeros(len(animals), dtype=bool)
+        for index in groups.values():
+            group = [animals[i] for i in index]
+            para = group[0].para
+            age = np.array([a._age for a in group]) + 1
+            weight = np.array([a._weight for a in group], dtype=float)
+            weight -= para.eta * weight
+            values = fitness(para, age, weight)
+            died = (weight <= 0) | (draws[index] < para.omega * (1.0 - values))
+            dead[index] = died
+            for a, a_age, a_weight, a_fitness, a_died in zip(
+                    group, age.tolist(), weight.tolist(), values.tolist(), died.tolist()):
+                if not a_died:
+                    a._age, a._weight, a._calculated_fitness = a_age, a_weight, a_fitness
+        return dead
 
     # Properties used to dirty the calculated fitness value upon changes
     @property
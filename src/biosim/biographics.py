@@ -1,11 +1,12 @@
 import matplotlib.pyplot as plt
 import numpy as np
 from .graphics import Graphics
+from .histogram import Histograms, DEFAULT_SPECS
 
 
 class BioGraphics(Graphics):
     def __init__(self, island_map, vis_years, ymax_animals, cmax_animals, hist_specs,
-                 img_dir=None, img_base=None, img_fmt=None, img_years=None):
+                 img_dir=None, img_base=None, img_fmt=None, img_years=None, movie_fmt=None):
         """
         :param ymax_animals: Number specifying y-axis limit for graph showing animal numbers
         :param cmax_animals: Dict specifying color-code limits for animal densities
@@ -16,6 +17,8 @@ class BioGraphics(Graphics):
         :param img_fmt: String with file type for figures, e.g. 'png'
         :param img_years: years between visualizations saved to files (default: vis_years) \
         Must be a multiple of vis_years
+        :param movie_fmt: If 'mp4', the saved years are streamed into an ffmpeg process
+                          making the movie ``{img_base}.mp4``, instead of written as images
 
         If ymax_animals is None, the y-axis limit should be adjusted automatically.
         If cmax_animals is None, sensible, fixed default values should be used.
@@ -29,13 +32,15 @@ class BioGraphics(Graphics):
 
             {'weight': {'max': 80, 'delta': 2}, 'fitness': {'max': 1.0, 'delta': 0.05}}
 
-        Permitted properties are 'weight', 'age', 'fitness'.
+        Permitted properties are 'weight', 'age', 'fitness'. Properties not given
+        use the bins of ``DEFAULT_SPECS`` in ``biosim.histogram``.
 
         If img_dir is None, no figures are written to file. Filenames are formed as
 
             f'{os.path.join(img_dir, img_base}_{img_number:05d}.{img_fmt}'
 
         where img_number are consecutive image numbers starting from 0.
+        With movie_fmt, no image files are written, and ``make_movie`` finishes the movie.
 
         img_dir and img_base must either be both None or both strings.
         """
@@ -43,11 +48,12 @@ class BioGraphics(Graphics):
             img_years = vis_years
         elif vis_years != 0 and img_years % vis_years != 0:
             raise ValueError("img_years must be a multiple of vis_years")
-        super().__init__(img_dir, img_base, img_fmt, img_years)
+        super().__init__(img_dir, img_base, img_fmt, img_years, movie_fmt)
         self.vis_years = vis_years
         self.ymax_animals = ymax_animals
         self.cmax_animals = cmax_animals if cmax_animals is not None else {}
         self.hist_specs = hist_specs if hist_specs is not None else {}
+        self.histograms = None
         self.img_years = img_years if img_years is not None else self.vis_years
         self.island_map = island_map
         self.num_years = 0
@@ -64,6 +70,16 @@ class BioGraphics(Graphics):
         self.year_text = None
         self.species_population_axis = {}
         self.heatmap_axis = {}
+        self.histogram_steps = {}
+
+        # Counts of each species per year, preallocated for num_years, see setup
+        self._count_years = np.arange(1)
+        self._counts = {}
+        self._first_year = None
+        # Blitting: the figure without the animated artists, None when it must be redrawn
+        self._blit = False
+        self._background = None
+        self._shown = False
 
     def setup(self, num_years):
         """
@@ -73,11 +89,18 @@ class BioGraphics(Graphics):
         This scales the x-axis of historical plots.
 
         Can be called again, if the total number of years we want to simulate has changed.
+        The buffers of the count graph are allocated here for all years, so updates
+        do not copy the history.
         """
         self.num_years = num_years
+        if num_years + 1 > len(self._count_years):
+            self._count_years = np.arange(num_years + 1)
+            for species, counts in self._counts.items():
+                self._counts[species] = np.append(counts, np.zeros(num_years + 1 - len(counts)))
 
         if self.fig is None:
             self.fig = (fig := plt.figure())
+            self._blit = fig.canvas.supports_blit
 
             # normal subplots
             self.island_ax = fig.add_subplot(3, 3, 1)
@@ -104,10 +127,12 @@ class BioGraphics(Graphics):
             self.year_text = axt.text(0.5, 0.5, '',
                                       horizontalalignment='center',
                                       verticalalignment='center',
-                                      transform=axt.transAxes)  # relative coordinates
+                                      transform=axt.transAxes,  # relative coordinates
+                                      animated=self._blit)
 
         self.species_pop_ax.set_xlim(0, num_years)
         self.species_pop_ax.set_ylim(0, self.ymax_animals)
+        self._background = None
 
     def _plot_map(self):
         #                   R    G    B
@@ -135,16 +160,19 @@ class BioGraphics(Graphics):
                                           facecolor=rgb_value[name[0]]))
             ax_lg.text(0.35, ix * 0.2, name, transform=ax_lg.transAxes)
 
-    def update(self, biosim):
+    def update(self, snapshot):
         """
-        :param biosim: the biosim with the state we want to visualize
+        :param snapshot: ``Snapshot`` of the island with the state we want to visualize
 
-        Uses the properties on the BioSim instance to fill heatmaps,
-        histograms and plots with data.
+        Uses the counts, densities and attribute arrays of the snapshot to fill heatmaps,
+        histograms and plots with data. The artists are made on the first update,
+        later updates only change their data.
 
         If the current year is a multiple of ``vis_years``,
         the plots are displayed on the screen. If ``vis_years`` is 0,
-        nothing ever gets plotted.
+        nothing ever gets plotted. Where the backend supports it, only the artists
+        that change are drawn, over a saved background (blitting). The whole figure is
+        drawn again only when an axis limit or color scale has changed.
 
         Will possibly also save an image file of the finished graphs,
         if year is a multiple of img_years and images are enabled.
@@ -152,87 +180,157 @@ class BioGraphics(Graphics):
         if self.vis_years == 0:
             return
 
-        self._plot_species_count(biosim.year, biosim.num_animals_per_species)
-        species_cell_counts = biosim.num_animals_per_cell_per_species
-        for species in species_cell_counts:
-            self._plot_population_map(species, species_cell_counts)
-        self._plot_hist_fitness(biosim.fitness_per_species)
-        self._plot_hist_age(biosim.ages_per_species)
-        self._plot_hist_weight(biosim.weights_per_species)
+        self._plot_species_count(snapshot.year, snapshot.counts)
+        for species, density in snapshot.density.items():
+            self._plot_population_map(species, density)
+        if self.histograms is None:
+            self.histograms = Histograms(list(snapshot.counts),
+                                         {**DEFAULT_SPECS, **self.hist_specs})
+        self.histograms.count(snapshot)
+        self._plot_histogram(self.fitness_histogram_ax, 'fitness', 'Fitness')
+        self._plot_histogram(self.age_histogram_ax, 'age', 'Age', legend=True)
+        self._plot_histogram(self.weight_histogram_ax, 'weight', 'Weight')
+
+        self.year_text.set_text(f"Year: {snapshot.year}")
+
+        if snapshot.year % self.vis_years == 0:
+            self._draw()
 
-        self.year_text.set_text(f"Year: {biosim.year}")
-        self.fig.canvas.flush_events()
+        self._save_graphics(snapshot.year)
 
-        if biosim.year % self.vis_years == 0:
+    def draw_frame(self, frame):
+        """
+        :param frame: ``Frame`` made by a ``FrameRenderer``
+
+        Draws the frame, with the scales given by it, and saves it as image ``frame.number``.
+        Used by the worker processes of a ``FrameRenderer``, see :ref:`rendering`.
+        """
+        if self.fig is None or frame.num_years != self.num_years:
+            self.setup(frame.num_years)
+
+        shown = slice(frame.first_year, frame.year + 1)
+        for specie, counts in frame.counts.items():
+            self._plot_species_count(frame.year, {specie: counts[-1]})
+            self._counts[specie][shown] = counts
+            self.species_population_axis[specie].set_data(self._count_years[shown],
+                                                          self._counts[specie][shown])
+        self._first_year = frame.first_year
+        self.species_pop_ax.set_ylim(0, frame.ymax['counts'])
+
+        for species, density in frame.density.items():
+            self._plot_population_map(species, density)
+            if species in self.heatmap_axis:
+                self.heatmap_axis[species].set_clim((0, frame.cmax[species]))
+
+        self.histograms = frame.histograms
+        self._plot_histogram(self.fitness_histogram_ax, 'fitness', 'Fitness')
+        self._plot_histogram(self.age_histogram_ax, 'age', 'Age', legend=True)
+        self._plot_histogram(self.weight_histogram_ax, 'weight', 'Weight')
+        for ax, prop in ((self.fitness_histogram_ax, 'fitness'), (self.age_histogram_ax, 'age'),
+                         (self.weight_histogram_ax, 'weight')):
+            ax.set_ylim(0, frame.ymax[prop])
+
+        self.year_text.set_text(f"Year: {frame.year}")
+        self._save_image(frame.number)
+
+    def _animated_artists(self):
+        """ :returns: The artists changing every year. """
+        return [*self.species_population_axis.values(), *self.heatmap_axis.values(),
+                *self.histogram_steps.values(), self.year_text]
+
+    def _draw(self):
+        """ Shows the figure, drawing only the changed artists if possible. """
+        if not self._shown:
             plt.pause(1e-6)
+            self._shown = True
+        canvas = self.fig.canvas
+        if not self._blit:
+            canvas.draw_idle()
+        else:
+            self._render_frame()
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def _render_frame(self):
+        """
+        Renders the figure into its canvas. With blitting, the animated artists are drawn
+        over the saved background, which is only drawn again if it is out of date.
 
-        self._save_graphics(biosim.year)
+        :returns: The canvas
+        """
+        canvas = self.fig.canvas
+        if not self._blit:
+            canvas.draw()
+            return canvas
+        if self._background is None:
+            canvas.draw()
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+        else:
+            canvas.restore_region(self._background)
+        for artist in self._animated_artists():
+            self.fig.draw_artist(artist)
+        return canvas
 
     def _plot_species_count(self, year, dict_species_count):
+        if self._first_year is None:
+            self._first_year = year
+        shown = slice(self._first_year, year + 1)
         for specie, count in dict_species_count.items():
             if specie not in self.species_population_axis:
-                self.species_population_axis[specie] = self.species_pop_ax.plot([], [], '-')[0]
-            xdata, ydata = self.species_population_axis[specie].get_data()
-            self.species_population_axis[specie].set_data(np.append(xdata, year),
-                                                          np.append(ydata, count))
+                self._counts[specie] = np.zeros(len(self._count_years))
+                self.species_population_axis[specie] = self.species_pop_ax.plot(
+                    [], [], '-', animated=self._blit)[0]
+            self._counts[specie][year] = count
+            self.species_population_axis[specie].set_data(self._count_years[shown],
+                                                          self._counts[specie][shown])
 
             if self.ymax_animals is None:
                 _, ymax = self.species_pop_ax.get_ylim()
-                self.species_pop_ax.set_ylim(0, max(ymax, count))
+                if count > ymax:
+                    # Leave room, so the whole figure is not redrawn for every new maximum
+                    self.species_pop_ax.set_ylim(0, 1.2 * count)
+                    self._background = None
 
-    def _plot_population_map(self, species, species_cell_counts):
+    def _plot_population_map(self, species, pop_map):
         if species not in self.heatmap_ax:
             return
 
-        pop_map = [[species_cell_counts[species][(i_row + 1, i_col + 1)]
-                    for i_col, col in enumerate(row)]
-                   for i_row, row in enumerate(self.island_map.splitlines())]
-        pop_cmax = self.cmax_animals.get(species, max(1, max(max(line) for line in pop_map)))
+        pop_cmax = self.cmax_animals.get(species, max(1, pop_map.max()))
         if species in self.heatmap_axis:
             self.heatmap_axis[species].set_data(pop_map)
             _, current_cmax = self.heatmap_axis[species].get_clim()
-            self.heatmap_axis[species].set_clim((0, max(current_cmax, pop_cmax)))
+            if pop_cmax > current_cmax:
+                self.heatmap_axis[species].set_clim((0, pop_cmax))
+                self._background = None
         else:
             self.heatmap_ax[species].set_title(f'{species} heatmap', fontsize=7)
             self.heatmap_ax[species].axis('on')
             self.heatmap_axis[species] = self.heatmap_ax[species].imshow(
                 pop_map, interpolation='nearest',
-                vmin=0, vmax=pop_cmax)
+                vmin=0, vmax=pop_cmax, animated=self._blit)
             plt.colorbar(self.heatmap_axis[species], ax=self.heatmap_ax[species],
                          orientation='vertical')
+            self._background = None
+
+    def _plot_histogram(self, ax, prop, title, legend=False):
+        edges = self.histograms.edges(prop)
+        counts = self.histograms.counts(prop)
+        if (prop, self.histograms.species[0]) not in self.histogram_steps:
+            ax.set_title(title, fontsize=7)
+            ax.set_xlim(edges[0], edges[-1])
+            ax.set_ylim(0, 1)
+            for species, species_counts in zip(self.histograms.species, counts):
+                self.histogram_steps[prop, species] = ax.stairs(species_counts, edges,
+                                                                label=species,
+                                                                animated=self._blit)
+            if legend:
+                ax.legend(bbox_to_anchor=(0.5, 3.), loc='lower center', borderaxespad=0.)
+            self._background = None
+        else:
+            for species, species_counts in zip(self.histograms.species, counts):
+                self.histogram_steps[prop, species].set_data(species_counts)
 
-    def _plot_hist_fitness(self, dict_species_fitness):
-        bins = None
-        if 'fitness' in self.hist_specs:
-            max_fitness = self.hist_specs['fitness']['max']
-            delta = self.hist_specs['fitness']['delta']
-            bins = np.linspace(0, max_fitness, int(max_fitness / delta) + 1)
-
-        self.fitness_histogram_ax.clear()
-        self.fitness_histogram_ax.set_title('Fitness', fontsize=7)
-        self.fitness_histogram_ax.hist(dict_species_fitness.values(), bins=bins, histtype='step')
-
-    def _plot_hist_age(self, dict_species_age):
-        bins = None
-        if 'age' in self.hist_specs:
-            max_age = self.hist_specs['age']['max']
-            delta = self.hist_specs['age']['delta']
-            bins = np.linspace(0, max_age, int(max_age / delta) + 1)
-
-        self.age_histogram_ax.clear()
-        self.age_histogram_ax.set_title('Age', fontsize=7)
-        self.age_histogram_ax.hist(dict_species_age.values(), label=list(dict_species_age.keys()),
-                                   bins=bins, histtype='step')
-        self.age_histogram_ax.legend(bbox_to_anchor=(0.5, 3.), loc='lower center',
-                                     borderaxespad=0.)
-
-    def _plot_hist_weight(self, dict_species_weight):
-        bins = None
-        if 'weight' in self.hist_specs:
-            max_weight = self.hist_specs['weight']['max']
-            delta = self.hist_specs['weight']['delta']
-            bins = np.linspace(0, max_weight, int(max_weight / delta) + 1)
-
-        self.weight_histogram_ax.clear()
-        self.weight_histogram_ax.set_title('Weight', fontsize=7)
-        self.weight_histogram_ax.hist(dict_species_weight.values(), bins=bins, histtype='step')
+        _, ymax = ax.get_ylim()
+        if counts.max() > ymax:
+            ax.set_ylim(0, 1.2 * counts.max())
+            self._background = None
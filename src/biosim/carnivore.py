@@ -1,17 +1,15 @@
 from .animals import Animal
-import random
+from .fitness import fitness
+from .prey import PreyIndex
+from .randomness import default_rng, uniforms
+import numpy as np
 
 
 class Carnivore(Animal):
     """ Class for a species of animal called carnivore """
 
-    def __init__(self, age, weight, parameters):
-        """
-        :param age: Age of carnivore as an integer
-        :param weight: Weight of carnivore as a float
-        :param parameters: Dict with valid parameter specification for carnivores
-        """
-        super().__init__('Carnivore', age, weight, parameters)
+    __slots__ = ()
+    species = 'Carnivore'
 
     @property
     def eating_priority(self):
@@ -21,11 +19,17 @@ class Carnivore(Animal):
         """
         return -1
 
+    @classmethod
+    def eating_priorities(cls, fitness):
+        """ See ``Animal.eating_priorities``. """
+        return np.full(len(fitness), -1.)
+
     # 1. feeding
-    def feed(self, fodder, prey_list):
+    def feed(self, fodder, prey_list, rng=None):
         """
         :param fodder: plant food available
-        :param prey_list: list of preys for carnivores to eat
+        :param prey_list: ``PreyIndex`` or list of preys for carnivores to eat
+        :param rng: ``numpy.random.Generator`` for the hunting attempts
 
         See ``Animal.feed``.
 
@@ -41,27 +45,53 @@ class Carnivore(Animal):
 
         :returns: 0 since carnivores only eat prey, no fodder.
         """
+        if not isinstance(prey_list, PreyIndex):
+            prey_list = PreyIndex(prey_list)
+        draws = uniforms(default_rng if rng is None else rng)
         # Amount of weight eaten this year
         eaten = 0
-        # We always attempt to eat the weakest first
-        prey_list.sort(key=lambda p: p.fitness)
         # Store our fitness locally, makes a significant speed difference
         own_fitness = self.fitness
-        for prey in prey_list:
-            # Skip trying to eat dead animals
-            if prey.weight <= 0:
-                continue
-
-            relative_fitness = (own_fitness - prey.fitness)/self.para['DeltaPhiMax']
+        # We always attempt to eat the weakest first, dead animals are skipped
+        for prey in prey_list.weakest_first():
+            relative_fitness = (own_fitness - prey.fitness)/self.para.DeltaPhiMax
             if relative_fitness < 0:  # We have no shot at eating this prey, or any following
                 break
-            if relative_fitness >= 1 or random.random() < relative_fitness:
+            if relative_fitness >= 1 or next(draws) < relative_fitness:
                 # Can not eat more than F
-                eaten += (dinner := min(prey.weight, self.para['F']-eaten))
+                eaten += (dinner := min(prey.weight, self.para.F-eaten))
                 prey.weight = 0  # Prey gets consumed upon eating
-                self.weight += dinner * self.para['beta']
+                self.weight += dinner * self.para.beta
                 own_fitness = self.fitness
-                if eaten >= self.para['F']:
+                if eaten >= self.para.F:
                     break
 
         return 0  # We didn't eat any fodder
+
+    @classmethod
+    def feed_population(cls, para, population, members, fodder, rng):
+        """
+        See ``Animal.feed_population``.
+        Each carnivore in turn hunts like in ``feed``, using the prey table of the cell.
+        """
+        prey = population.prey_table()
+        draws = uniforms(rng)
+        for i in members.tolist():
+            age, weight = population.age.item(i), population.weight.item(i)
+            own_fitness = population.fitness.item(i)
+            eaten = 0
+            for j in prey.weakest_first():
+                relative_fitness = (own_fitness - prey.fitness[j])/para.DeltaPhiMax
+                if relative_fitness < 0:
+                    break
+                if relative_fitness >= 1 or next(draws) < relative_fitness:
+                    eaten += (dinner := min(prey.weight[j], para.F-eaten))
+                    prey.alive[j] = False
+                    weight += dinner * para.beta
+                    own_fitness = float(fitness(para, age, weight))
+                    if eaten >= para.F:
+                        break
+
+            population.weight[i] = weight
+            population.fitness[i] = own_fitness
+        return 0
@@ -0,0 +1,145 @@
+import multiprocessing
+import numpy as np
+from .parameters import default_animal_parameters_copy, default_land_parameters_copy, \
+    assert_valid_animal_parameter, assert_valid_land_parameter
+from .island import Island
+from .simulation import _backends
+
+
+def _simulate_counts(task):
+    """
+    Runs one headless simulation. Runs in a worker process.
+
+    :returns: The seed, and an array with the number of animals of each species,
+              at the start and after every year.
+    """
+    island_map, ini_pop, animal_parameters, land_parameters, cell_type, num_years, seed = task
+    island = Island(island_map, land_parameters, cell_type, np.random.default_rng(seed))
+    island.add_populations(ini_pop, animal_parameters)
+    return seed, _count_years(island, list(animal_parameters), num_years)
+
+
+def _count_years(island, species, num_years):
+    """
+    Simulates the island for ``num_years``.
+
+    :returns: Array with the number of animals of each species, at the start and after every year.
+    """
+    counts = np.zeros((num_years + 1, len(species)), dtype=np.int32)
+    counts[0] = [island.species_count(s) for s in species]
+    for year in range(1, num_years + 1):
+        island.simulate_year()
+        counts[year] = [island.species_count(s) for s in species]
+    return counts
+
+
+class Ensemble:
+    """
+    The same simulation, run for many seeds in a pool of headless worker processes.
+
+    Each run gives the same counts as ``BioSim`` with that seed.
+    Only the number of animals of each species per year is sent back from the workers,
+    and collected in an ``EnsembleResult``.
+    """
+
+    def __init__(self, island_map, ini_pop, backend='objects'):
+        """
+        :param island_map: Multi-line string specifying island geography
+        :param ini_pop: List of dictionaries specifying initial population, see :ref:`island`.
+        :param backend: How animals are stored, see ``BioSim``.
+        """
+        if backend not in _backends:
+            raise ValueError(f'Unknown backend {backend}')
+        self.island_map = island_map
+        self.ini_pop = ini_pop
+        self.cell_type = _backends[backend]
+        self.animal_parameters = default_animal_parameters_copy()
+        self.land_parameters = default_land_parameters_copy()
+
+    def set_animal_parameters(self, species, params):
+        """ See ``BioSim.set_animal_parameters``. """
+        for param, value in params.items():
+            assert_valid_animal_parameter(species, param, value)
+            self.animal_parameters[species][param] = value
+
+    def set_landscape_parameters(self, landscape, params):
+        """ See ``BioSim.set_landscape_parameters``. """
+        for param, value in params.items():
+            assert_valid_land_parameter(landscape, param, value)
+            self.land_parameters[landscape][param] = value
+
+    def run(self, seeds, num_years, processes=None):
+        """
+        :param seeds: The seeds to simulate with, one run per seed
+        :param num_years: Number of years to simulate in every run
+        :param processes: Number of worker processes, default one per CPU.
+                          With 1, all runs are done in this process.
+        :returns: ``EnsembleResult`` with the counts of all runs
+        """
+        seeds = list(seeds)
+        if len(set(seeds)) != len(seeds):
+            raise ValueError("Every run needs its own seed")
+        tasks = [(self.island_map, self.ini_pop, self.animal_parameters, self.land_parameters,
+                  self.cell_type, num_years, seed) for seed in seeds]
+        result = EnsembleResult(seeds, list(self.animal_parameters), num_years)
+        if processes == 1:
+            for task in tasks:
+                result.add(*_simulate_counts(task))
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                for seed, counts in pool.imap_unordered(_simulate_counts, tasks):
+                    result.add(seed, counts)
+        return result
+
+
+class EnsembleResult:
+    """
+    Yearly counts of every species for the runs of an ``Ensemble``.
+
+    ``counts`` is an array indexed by ``[run, year, species]``, with the runs in
+    the order of ``seeds`` and year 0 holding the initial counts.
+    """
+
+    def __init__(self, seeds, species, num_years):
+        """
+        :param seeds: Seed of each run
+        :param species: Names of the species counted
+        :param num_years: Number of years simulated in each run
+        """
+        self.seeds = seeds
+        self.species = species
+        self.counts = np.zeros((len(seeds), num_years + 1, len(species)), dtype=np.int32)
+        self._run = {seed: run for run, seed in enumerate(seeds)}
+
+    def add(self, seed, counts):
+        """ Stores the counts of the run with the given seed. """
+        self.counts[self._run[seed]] = counts
+
+    def species_counts(self, species):
+        """ :returns: Array with the counts of the species, indexed by ``[run, year]``. """
+        return self.counts[:, :, self.species.index(species)]
+
+    def mean(self, species):
+        """ :returns: Array with the mean count of the species each year. """
+        return self.species_counts(species).mean(axis=0)
+
+    def quantiles(self, species, q=(0.05, 0.5, 0.95)):
+        """
+        :param q: The quantiles to calculate
+        :returns: Array with the quantiles of the count of the species, indexed by ``[q, year]``.
+        """
+        return np.quantile(self.species_counts(species), q, axis=0)
+
+    def extinction_years(self, species):
+        """
+        :returns: Array with the first year without animals of the species for each run,
+                  NaN if the species survived all years.
+        """
+        extinct = self.species_counts(species)[:, 1:] == 0
+        years = np.argmax(extinct, axis=1) + 1.0
+        years[~extinct.any(axis=1)] = np.nan
+        return years
+
+    def extinction_probability(self, species):
+        """ :returns: Fraction of the runs where the species was extinct in the last year. """
+        return float(np.mean(self.species_counts(species)[:, -1] == 0))
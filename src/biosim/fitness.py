@@ -0,0 +1,18 @@
+import numpy as np
+
+
+def fitness(para, age, weight):
+    """
+    :param para: Parameters of one species
+    :param age: Array (or number) of ages
+    :param weight: Array (or number) of weights
+
+    Vectorized version of ``Animal.fitness``, see :ref:`animals`.
+    Calculates the fitness of many animals of one species in a single pass.
+
+    :returns: The fitness of each animal, zero for animals without weight.
+    """
+    with np.errstate(over='ignore'):
+        q_plus = 1 / (1 + np.exp(para.phi_age * (age - para.a_half)))
+        q_minus = 1 / (1 + np.exp(-para.phi_weight * (weight - para.w_half)))
+    return np.where(weight > 0, q_plus * q_minus, 0.)
@@ -16,6 +16,7 @@
 import matplotlib.pyplot as plt
 import subprocess
 import os
+import weakref
 
 # Update these variables to point to your ffmpeg and convert binaries
 # If you installed ffmpeg using conda or installed both softwares in
@@ -29,12 +30,23 @@ _DEFAULT_GRAPHICS_DIR = os.path.join('../../../../../../..', 'data')
 _DEFAULT_GRAPHICS_NAME = 'dv'
 _DEFAULT_IMG_FORMAT = 'png'
 _DEFAULT_MOVIE_FORMAT = 'mp4'   # alternatives: mp4, gif
+_STREAM_FRAME_RATE = 25
+
+
+def _close_stream(process):
+    """ Ends the input of an ffmpeg process streaming a movie, and waits for it to finish. """
+    try:
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    return process.wait()
 
 
 class Graphics:
     """Provides graphics support for RandVis."""
 
-    def __init__(self, img_dir=None, img_name=None, img_fmt=None, img_step=None):
+    def __init__(self, img_dir=None, img_name=None, img_fmt=None, img_step=None,
+                 movie_fmt=None):
         """
         :param img_dir: directory for image files; no images if None
         :type img_dir: str
@@ -44,6 +56,9 @@ class Graphics:
         :type img_fmt: str
         :param img_step: steps between visualizations saved to files (default: 1)
         :type img_step: int
+        :param movie_fmt: if 'mp4', saved steps are streamed as raw frames into ffmpeg,
+                          making the movie while simulating, without any image files
+        :type movie_fmt: str
         """
 
         if img_name is None:
@@ -61,6 +76,12 @@ class Graphics:
         self._img_ctr = 0
         self._img_step = img_step if img_step is not None else 1
 
+        if movie_fmt not in (None, 'mp4'):
+            raise ValueError('Only mp4 movies can be streamed, not ' + movie_fmt)
+        self._movie_fmt = movie_fmt
+        self._stream = None
+        self._stream_finalizer = None
+
     def update(self, biosim):
         """
         Updates graphics with current data and save to file if necessary.
@@ -68,7 +89,8 @@ class Graphics:
 
     def make_movie(self, movie_fmt=None):
         """
-        Creates MPEG4 movie from visualization images saved, if image saving was enabled
+        Creates MPEG4 movie from visualization images saved, if image saving was enabled.
+        If the movie is streamed, finishes it.
 
         .. :note:
             Requires ffmpeg for MP4 and magick for GIF
@@ -79,6 +101,12 @@ class Graphics:
         if self._img_base is None:
             raise RuntimeError("Can't make movie without image files")
 
+        if self._movie_fmt is not None:
+            if movie_fmt not in (None, self._movie_fmt):
+                raise ValueError(f'The movie was streamed as {self._movie_fmt}')
+            self._finish_stream()
+            return
+
         if movie_fmt is None:
             movie_fmt = _DEFAULT_MOVIE_FORMAT
 
@@ -123,6 +151,61 @@ class Graphics:
         if self._img_base is None or step % self._img_step != 0:
             return
 
-        filename = f"{self._img_base}_{self._img_ctr:05d}.{self._img_fmt}"
-        plt.savefig(filename)
+        if self._movie_fmt is not None:
+            self._stream_frame()
+        else:
+            self._save_image(self._img_ctr)
         self._img_ctr += 1
+
+    def _save_image(self, number):
+        """Saves graphics to the image file with the given number."""
+        plt.gcf().savefig(f"{self._img_base}_{number:05d}.{self._img_fmt}")
+
+    def _render_frame(self):
+        """
+        Renders the whole figure into its canvas, for streaming.
+
+        :returns: The canvas
+        """
+        canvas = plt.gcf().canvas
+        canvas.draw()
+        return canvas
+
+    def _stream_frame(self):
+        """
+        Writes the figure as one raw RGBA frame to ffmpeg, started on the first frame.
+        The pixels are passed straight from the canvas buffer, without encoding an image.
+        """
+        canvas = self._render_frame()
+        if self._stream is None:
+            width, height = canvas.get_width_height(physical=True)
+            # Parameters as for make_movie, padded since yuv420p needs an even size
+            command = [_FFMPEG_BINARY, '-y',
+                       '-f', 'rawvideo', '-pix_fmt', 'rgba',
+                       '-s', f'{width}x{height}', '-r', str(_STREAM_FRAME_RATE),
+                       '-i', '-',
+                       '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                       '-profile:v', 'baseline',
+                       '-level', '3.0',
+                       '-pix_fmt', 'yuv420p',
+                       '{}.{}'.format(self._img_base, self._movie_fmt)]
+            try:
+                self._stream = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                                stdout=subprocess.DEVNULL,
+                                                stderr=subprocess.DEVNULL)
+            except OSError as err:
+                raise RuntimeError('ERROR: could not start ffmpeg: {}'.format(err))
+            self._stream_finalizer = weakref.finalize(self, _close_stream, self._stream)
+        try:
+            self._stream.stdin.write(canvas.buffer_rgba())
+        except BrokenPipeError:
+            self._finish_stream()
+
+    def _finish_stream(self):
+        """ Closes the stream to ffmpeg, which then writes the end of the movie. """
+        if self._stream is None:
+            return
+        returncode = self._stream_finalizer()
+        self._stream = None
+        if returncode != 0:
+            raise RuntimeError('ERROR: ffmpeg failed with exit status {}'.format(returncode))
@@ -1,16 +1,12 @@
 from .animals import Animal
+import numpy as np
 
 
 class Herbivore(Animal):
     """ Class for a species of animal called herbivore """
 
-    def __init__(self, age, weight, parameters):
-        """
-        :param age: Age of herbivore as an integer
-        :param weight: Weight of herbivore as a float
-        :param parameters: Dict with valid parameter specification for herbivores
-        """
-        super().__init__('Herbivore', age, weight, parameters)
+    __slots__ = ()
+    species = 'Herbivore'
 
     @property
     def eating_priority(self):
@@ -20,11 +16,17 @@ class Herbivore(Animal):
         """
         return self.fitness
 
+    @classmethod
+    def eating_priorities(cls, fitness):
+        """ See ``Animal.eating_priorities``. """
+        return fitness
+
     # 1. feeding
-    def feed(self, fodder, prey_list):
+    def feed(self, fodder, prey_list, rng=None):
         """
         :param fodder: The amount of plant fodder left in our landscape
         :param prey_list: List of prey in our landscape, we don't eat them
+        :param rng: Not used, herbivores eat without random events
 
         The herbivore will eat until there is no more fodder, or it has eaten :math:`F`.
         After eating, the body weight increases by
@@ -32,6 +34,39 @@ class Herbivore(Animal):
 
         :returns: Amount of fodder eaten
         """
-        eat = min(fodder, self.para['F'])  # Can only eat up to F
-        self.weight += eat * self.para['beta']
+        eat = min(fodder, self.para.F)  # Can only eat up to F
+        self.weight += eat * self.para.beta
         return eat
+
+    @classmethod
+    def feed_animals(cls, para, animals, fodder, prey_list, rng=None):
+        """
+        See ``Animal.feed_animals``.
+
+        The outcome of ``feed`` in order only depends on the fodder left:
+        the first :math:`\\lfloor f / F \\rfloor` animals eat :math:`F` each,
+        one might eat the remainder, the rest eat nothing.
+        The amounts are found in one step, and only the animals that ate get a new weight.
+        """
+        eat = np.clip(fodder - para.F * np.arange(len(animals)), 0, para.F)
+        eaters = int(np.count_nonzero(eat))
+        if eaters == 0:
+            return fodder
+        weights = np.array([a.weight for a in animals[:eaters]]) + eat[:eaters] * para.beta
+        for a, weight in zip(animals, weights.tolist()):
+            a.weight = weight
+        prey_list.invalidate()
+        return fodder - eat.sum()
+
+    @classmethod
+    def feed_population(cls, para, population, members, fodder, rng):
+        """
+        See ``Animal.feed_population``.
+
+        The outcome of ``feed`` in order only depends on the fodder left:
+        the first animals eat :math:`F` each, one might eat the remainder, the rest eat nothing.
+        """
+        eat = np.clip(fodder - para.F * np.arange(len(members)), 0, para.F)
+        population.weight[members] += eat * para.beta
+        population.dirty[members[eat > 0]] = True
+        return eat.sum()
@@ -0,0 +1,112 @@
+import numpy as np
+
+# Animal attributes with histograms, in the order of ``species_attributes`` of the cells
+PROPERTIES = ('fitness', 'age', 'weight')
+
+# Bins used for properties missing from ``hist_specs``
+DEFAULT_SPECS = {'fitness': {'max': 1.0, 'delta': 0.05},
+                 'age': {'max': 60, 'delta': 2},
+                 'weight': {'max': 60, 'delta': 2}}
+
+
+class Histogram:
+    """
+    Counts of values in bins from 0 to ``max``, of width ``delta``, as given by ``hist_specs``.
+
+    Values are added in blocks, and binned by computing the index of their bin
+    and counting the indices with ``np.bincount``. Values outside ``[0, max]`` are not counted.
+    The counts are the same as ``np.histogram`` with ``edges`` as bins.
+    """
+
+    def __init__(self, max_value, delta):
+        """
+        :param max_value: Upper edge of the last bin, ``max`` of ``hist_specs``
+        :param delta: Width of the bins, rounded to fit a whole number of bins
+        """
+        self.edges = np.linspace(0, max_value, int(round(max_value / delta)) + 1)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self._scale = len(self.counts) / max_value
+
+    def reset(self):
+        """ Sets all counts to zero. """
+        self.counts[:] = 0
+
+    def add(self, values):
+        """ :param values: Array or list of values to count """
+        values = np.asarray(values, dtype=float)
+        values = values[(values >= 0) & (values <= self.edges[-1])]
+        bins = len(self.counts)
+        index = np.minimum((values * self._scale).astype(np.intp), bins - 1)
+        # Rounding may put values next to an edge in the wrong bin, corrected like np.histogram
+        index[values < self.edges[index]] -= 1
+        index[(values >= self.edges[index + 1]) & (index != bins - 1)] += 1
+        self.counts += np.bincount(index, minlength=bins)
+
+
+class Histograms:
+    """
+    A ``Histogram`` for each species and each property in ``hist_specs``.
+
+    Filled from the cells of an island by ``Island.histograms``, without gathering
+    the values of all animals first, or from a ``Snapshot`` by ``count``.
+    """
+
+    def __init__(self, species, hist_specs):
+        """
+        :param species: Names of the species
+        :param hist_specs: Dict with ``max`` and ``delta`` for each property to count,
+                           one of ``'fitness'``, ``'age'`` and ``'weight'``
+        """
+        for prop in hist_specs:
+            if prop not in PROPERTIES:
+                raise ValueError(f'No histogram for {prop}')
+        self.species = list(species)
+        self.properties = [prop for prop in PROPERTIES if prop in hist_specs]
+        self.histograms = {prop: {s: Histogram(hist_specs[prop]['max'], hist_specs[prop]['delta'])
+                                  for s in self.species}
+                           for prop in self.properties}
+
+    def __bool__(self):
+        return bool(self.properties)
+
+    def edges(self, prop):
+        """ :returns: The bin edges of the histograms of the property. """
+        return self.histograms[prop][self.species[0]].edges
+
+    def counts(self, prop):
+        """ :returns: Array with the counts of the property, indexed by ``[species, bin]``. """
+        return np.array([self.histograms[prop][s].counts for s in self.species])
+
+    def reset(self):
+        """ Sets all counts to zero. """
+        for histograms in self.histograms.values():
+            for histogram in histograms.values():
+                histogram.reset()
+
+    def add(self, species, attributes):
+        """
+        :param species: Name of the species
+        :param attributes: Tuple with fitness, age and weight values, as given by
+                           ``species_attributes`` of a cell
+        """
+        if species not in self.species:
+            return
+        for prop, values in zip(PROPERTIES, attributes):
+            if prop in self.histograms:
+                self.histograms[prop][species].add(values)
+
+    def merge(self, other):
+        """ Adds the counts of ``other``, with the same species and bins, to these counts. """
+        for prop, histograms in self.histograms.items():
+            for s, histogram in histograms.items():
+                histogram.counts += other.histograms[prop][s].counts
+
+    def count(self, snapshot):
+        """
+        :param snapshot: ``Snapshot`` with attribute arrays
+        :returns: These histograms, with the counts of the snapshot.
+        """
+        self.reset()
+        for s in self.species:
+            self.add(s, (snapshot.fitness[s], snapshot.age[s], snapshot.weight[s]))
+        return self
@@ -0,0 +1,103 @@
+import json
+import numpy as np
+
+
+def _meta_file(path):
+    """ :returns: The file next to the history with its species and years. """
+    return f'{path}.json'
+
+
+class DensityHistory:
+    """
+    The number of animals of each species in each cell, for every year of a long run,
+    kept in a memory-mapped ``.npy`` file instead of in memory.
+
+    The file holds one array indexed by ``[year, species, row, col]``, with room for
+    ``num_years`` years, allocated when the history is made. Each year is written in place,
+    by passing its slot to ``Island.density`` as ``out``, so no copy of the grid is made.
+    The species and the years written are kept in a small JSON file next to it,
+    updated with the data every ``flush_years``, so a run that stops early
+    leaves a history of the years written up to then.
+    Use ``open_density_history`` to read it, without loading more than the parts used.
+    """
+
+    def __init__(self, path, species, shape, num_years, first_year=0, dtype=np.int32,
+                 flush_years=10):
+        """
+        :param path: The ``.npy`` file to write. An existing file is replaced.
+        :param species: Names of the species to record
+        :param shape: ``(rows, cols)`` of the island map
+        :param num_years: Number of years there is room for
+        :param first_year: The first year to be written
+        :param dtype: Integer type of the counts
+        :param flush_years: Number of years written between each flush to disk
+        """
+        if flush_years < 1:
+            raise ValueError('flush_years must be positive')
+        self.path = path
+        self.species = list(species)
+        self.first_year = first_year
+        self.years = 0
+        self.flush_years = flush_years
+        self.data = np.lib.format.open_memmap(path, mode='w+', dtype=dtype,
+                                              shape=(num_years, len(self.species)) + tuple(shape))
+        self._write_meta()
+
+    @property
+    def num_years(self):
+        """ Number of years there is room for. """
+        return len(self.data)
+
+    @property
+    def room(self):
+        """ Number of years there is still room for. """
+        return self.num_years - self.years
+
+    def slot(self, year):
+        """
+        :param year: The year to write next, following the last year written
+        :returns: The part of the file for the year, indexed by ``[species, row, col]``,
+                  to write the counts into.
+        """
+        if self.data is None:
+            raise RuntimeError('The history is closed')
+        if year != self.first_year + self.years:
+            raise ValueError(f'Expected year {self.first_year + self.years}, not {year}')
+        if self.years == self.num_years:
+            raise ValueError(f'No room for year {year}, the history holds {self.num_years} years')
+        # The slots handed out before are written by now
+        if self.years and self.years % self.flush_years == 0:
+            self.flush()
+        self.years += 1
+        return self.data[self.years - 1]
+
+    def _write_meta(self):
+        with open(_meta_file(self.path), 'w') as file:
+            json.dump({'species': self.species, 'first_year': self.first_year,
+                       'years': self.years}, file)
+
+    def flush(self):
+        """ Writes the years so far to disk, the last slot included. """
+        self.data.flush()
+        self._write_meta()
+
+    def close(self):
+        """ Writes the years so far to disk, and releases the file. """
+        if self.data is not None:
+            self.flush()
+            self.data = None
+
+
+def open_density_history(path):
+    """
+    :param path: File written by a ``DensityHistory``
+    :returns: Dict with ``species``, the ``years`` written, and ``density``,
+              a read-only memory-mapped array indexed by ``[year, species, row, col]``.
+              Slicing it only reads the years and cells sliced.
+    """
+    with open(_meta_file(path)) as file:
+        meta = json.load(file)
+    density = np.load(path, mmap_mode='r')[:meta['years']]
+    return {'species': meta['species'],
+            'years': np.arange(meta['first_year'], meta['first_year'] + meta['years']),
+            'density': density}
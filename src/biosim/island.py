@@ -1,4 +1,19 @@
+import numpy as np
+from collections import Counter
 from .landscape import Landscape
+from .snapshot import Snapshot
+from .profiling import NullProfiler
+
+
+def _spawn(rng, n):
+    """
+    :returns: ``n`` independent generators, spawned from the seed sequence of ``rng``,
+              like ``Generator.spawn`` of numpy 1.25 and later does.
+    """
+    bit_generator = rng.bit_generator
+    # The seed sequence is only public from numpy 1.25
+    seed_seq = getattr(bit_generator, 'seed_seq', None) or bit_generator._seed_seq
+    return [np.random.Generator(type(bit_generator)(seed)) for seed in seed_seq.spawn(n)]
 
 
 class Island:
@@ -7,33 +22,115 @@ class Island:
     with animals and simulation of years.
     """
 
-    def __init__(self, landscape, land_parameters):
+    def __init__(self, landscape, land_parameters, cell_type=Landscape, rng=None,
+                 cell_streams=False):
         """
         :param landscape: A multiline string of valid land_type chars, defining the island.
         :param land_parameters: A dict of parameters for each possible land_type char.
+        :param cell_type: Class of the landscape cells, ``Landscape`` or ``PopulationLandscape``.
+        :param rng: ``numpy.random.Generator`` shared by all cells for random events.
+                    A new, randomly seeded one is made if not given.
+        :param cell_streams: If True, every cell gets its own generator, spawned from ``rng``.
+                             The outcome then does not depend on the order cells are simulated in,
+                             as needed by ``ParallelIsland``, see :ref:`parallel`.
 
         The island map must be rectangular, and the border must consist of only the 'W' land type.
         Landscape cells are indexed as ``(row, col)``, with ``(1,1)`` being the upper left corner.
+
+        Internally the cells are stored as a dense grid, in row-major order,
+        with the land type of each cell as a code in the NumPy array ``land_codes``.
+        The neighbours of every cell are looked up once, when the island is made.
+
+        Only the cells in the active set, those with animals, are simulated each year.
+        The number of animals of each species on the island is summed from the counters
+        of the active cells when they change, so counting needs no pass over the animals.
         """
-        self._map = dict()
+        self._init_state(land_parameters, cell_type, rng, cell_streams)
+        self._make_map(landscape)
+
+    def _init_state(self, land_parameters, cell_type, rng, cell_streams):
+        """ Sets up the state of an island without cells, see ``__init__``. """
         self.land_parameters = land_parameters
+        self.cell_type = cell_type
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.cell_streams = cell_streams
 
-        self._make_map(landscape)
+        self.shape = (0, 0)
+        self.land_types = list(land_parameters)
+        self.land_codes = None
+        self._cells = []
+        self._neighbours = []
+        self._landing = []
+        self._active = set()
+        self._counts = Counter()
+        # Replaced by a ``PhaseProfiler`` to record the time spent in each phase
+        self.profiler = NullProfiler()
 
     def _make_map(self, landscape):
-        """ Uses the given landscape string to populate ``_map`` with instances of Landscape. """
+        """
+        Uses the given landscape string to fill the grid with ``cell_type`` instances,
+        and builds the neighbour tables.
+        """
         landscape = landscape.split()
         width = len(landscape[0])
         if any(cell != 'W' for cell in landscape[0] + landscape[-1]):
             raise ValueError("Not an island!")
-        for i_row, row in enumerate(landscape):
+        for row in landscape:
             if len(row) != width:
                 raise ValueError("Map rows have differing widths")
             if row[0] != 'W' or row[-1] != 'W':
                 raise ValueError("Not an island!")
-            for i_col, land_type in enumerate(row):
-                loc = (i_row + 1, i_col + 1)
-                self._map[loc] = Landscape(land_type, self.land_parameters)
+
+        self.shape = (len(landscape), width)
+        streams = _spawn(self.rng, len(landscape) * width) if self.cell_streams else None
+        for land_type in ''.join(landscape):
+            rng = streams[len(self._cells)] if streams else self.rng
+            self._cells.append(self.cell_type(land_type, self.land_parameters, rng))
+        self.land_codes = np.array([[self.land_types.index(land_type) for land_type in row]
+                                    for row in landscape], dtype=np.uint8)
+        self._build_tables()
+
+    def _build_tables(self):
+        """ Builds the tables of neighbour cells, and of neighbours migrants can land in. """
+        neighbours = [self._find_neighbours(index) for index in range(len(self._cells))]
+        self._neighbours = [[self._cells[n] for n in indices] for indices in neighbours]
+        # The habitable neighbours are the only cells migrants can land in
+        self._landing = [[n for n in indices if self._cells[n].habitable] for indices in neighbours]
+
+    def _find_neighbours(self, index):
+        """ :returns: Indices of the cells south, east, north and west, if inside the map. """
+        rows, cols = self.shape
+        row, col = divmod(index, cols)
+        neighbours = [(row + 1, col), (row, col + 1), (row - 1, col), (row, col - 1)]
+        return [r * cols + c for r, c in neighbours if 0 <= r < rows and 0 <= c < cols]
+
+    def _index(self, loc):
+        """ :returns: Index into the grid of the ``(row, col)`` location. """
+        rows, cols = self.shape
+        try:
+            row, col = loc
+        except (TypeError, ValueError):
+            raise ValueError(f'Illegal coordinate {loc}')
+        if not (1 <= row <= rows and 1 <= col <= cols):
+            raise ValueError(f'Illegal coordinate {loc}')
+        return (row - 1) * cols + (col - 1)
+
+    def _location(self, index):
+        """ :returns: The ``(row, col)`` location of the cell at the grid index. """
+        row, col = divmod(index, self.shape[1])
+        return row + 1, col + 1
+
+    def _locations(self):
+        """ :returns: The ``(row, col)`` location of every cell, in grid order. """
+        rows, cols = self.shape
+        return [(row, col) for row in range(1, rows + 1) for col in range(1, cols + 1)]
+
+    def cell(self, loc):
+        """
+        :param loc: Location as ``(row, col)``
+        :returns: The landscape cell at the location
+        """
+        return self._cells[self._index(loc)]
 
     def add_populations(self, populations, parameters):
         """
@@ -46,24 +143,110 @@ class Island:
         see :ref:`landscape`.
         """
         for population in populations:
-            loc = population['loc']
-            if loc not in self._map:
-                raise ValueError(f'Illegal coordinate {loc}')
-            self._map[loc].add_population(population['pop'], parameters)
+            index = self._index(population['loc'])
+            self._cells[index].add_population(population['pop'], parameters)
+            if self._cells[index].animals:
+                self._active.add(index)
+        self._recount()
+
+    def _recount(self):
+        """ Sums the species counters of the active cells into the island census. """
+        self._counts = Counter()
+        for index in self._active:
+            self._counts.update(self._cells[index].species_counts())
 
     def species_count(self, species):
         """
         :param species: The species we want to count
         :returns: The total number of animals of the given species on the island.
         """
-        return sum(cell.get_count_of_species(species) for cell in self._map.values())
+        return self._counts[species]
+
+    def species_counts(self):
+        """ :returns: Dict with the total number of animals of each species on the island. """
+        return dict(self._counts)
 
     def cell_population(self, species):
         """
         :param species: The species we want to count.
         :returns: A dict with number of individuals of the given species for each cell location.
         """
-        return {loc: cell.get_count_of_species(species) for loc, cell in self._map.items()}
+        return {loc: cell.get_count_of_species(species)
+                for loc, cell in zip(self._locations(), self._cells)}
+
+    def density(self, species, out=None):
+        """
+        :param species: Names of the species to count
+        :param out: Integer array shaped ``(len(species), rows, cols)`` to write the counts into,
+                    e.g. one year of a memory-mapped ``DensityHistory``. New array if None.
+        :returns: The array with the number of animals of each species in each cell.
+        """
+        if out is None:
+            out = np.zeros((len(species),) + self.shape, dtype=int)
+        return self._fill_density(species, out, 0)
+
+    def _fill_density(self, species, out, start):
+        """
+        Writes the counts of the active cells into ``out``, whose first cell
+        is the cell at grid index ``start``.
+
+        :returns: ``out``
+        """
+        out[...] = 0
+        cols = self.shape[1]
+        layers = {s: out[layer] for layer, s in enumerate(species)}
+        for index in self._active:
+            position = divmod(index - start, cols)
+            for s, count in self._cells[index].species_counts().items():
+                if s in layers:
+                    layers[s][position] = count
+        return out
+
+    def histograms(self, histograms):
+        """
+        :param histograms: ``Histograms`` to fill
+        :returns: The histograms, counting the animals on the island.
+
+        The values of each cell are added as they are stored, without joining them first.
+        """
+        histograms.reset()
+        if histograms:
+            for index in self._active:
+                for s, values in self._cells[index].species_attributes().items():
+                    histograms.add(s, values)
+        return histograms
+
+    def snapshot(self, species, year=None, attributes=True):
+        """
+        :param species: Names of the species to include
+        :param year: The year to mark the snapshot with
+        :param attributes: If False, only counts and densities are gathered,
+                           and the fitness, age and weight arrays are empty.
+        :returns: A ``Snapshot`` of counts, densities and animal attributes for each species,
+                  gathered in a single pass over the occupied cells.
+        """
+        rows, cols = self.shape
+        density = {s: np.zeros(self.shape, dtype=int) for s in species}
+        columns = {s: ([], [], []) for s in species}
+        for index in sorted(self._active):
+            cell = self._cells[index]
+            for s, count in cell.species_counts().items():
+                if s in density:
+                    density[s][divmod(index, cols)] = count
+            if not attributes:
+                continue
+            for s, values in cell.species_attributes().items():
+                if s in columns:
+                    for column, cell_values in zip(columns[s], values):
+                        column.append(cell_values)
+
+        def join(parts, dtype):
+            return np.concatenate(parts).astype(dtype) if parts else np.empty(0, dtype=dtype)
+
+        return Snapshot(year, {s: self._counts[s] for s in species}, density,
+                        {s: join(columns[s][0], float) for s in species},
+                        {s: join(columns[s][1], int) for s in species},
+                        {s: join(columns[s][2], float) for s in species})
 
     def species_fitness(self, species):
         """
@@ -71,7 +254,7 @@ class Island:
         :returns: A list of fitness for all animals of the given species on the island.
         """
         fitness = []
-        for cell in self._map.values():
+        for cell in self._cells:
             fitness.extend(cell.species_fitness(species))
         return fitness
 
@@ -81,7 +264,7 @@ class Island:
         :returns: A list of ages for all animals of the given species on the island.
         """
         ages = []
-        for cell in self._map.values():
+        for cell in self._cells:
             ages.extend(cell.species_ages(species))
         return ages
 
@@ -91,26 +274,67 @@ class Island:
         :returns: A list of weights for all animals of the given species on the island.
         """
         weights = []
-        for cell in self._map.values():
+        for cell in self._cells:
             weights.extend(cell.species_weights(species))
         return weights
 
     def simulate_year(self):
         """
-        Simulates one year on the island by iterating through each cell on island,
+        Simulates one year on the island by iterating through each active cell on island,
         and performing each step of the simulation. See the top of this document.
+
+        Empty cells are skipped, apart from the habitable neighbours of active cells,
+        which may receive migrants. The cells still with animals at the end of the year
+        make up the active set of the next year.
+        Cells are visited in grid order, so skipping them does not change the random draws.
+
+        Every phase of every cell is reported to ``profiler``, see :ref:`profiling`.
+        """
+        self.profiler.start_year()
+        landing = self._feed_breed_migrate()
+        self._settle(landing)
+        self.profiler.end_year(len(landing), self._location)
+
+    def _feed_breed_migrate(self):
         """
+        Runs the first half of the year, feeding, breeding and migration, on the active cells.
 
-        for (row, col), cell in self._map.items():
+        :returns: Set of indices of the cells to settle, the active cells and the cells
+                  migrants may have landed in.
+        """
+        profiler = self.profiler
+        active = sorted(self._active)
+        landing = set(active)
+
+        for index in active:
+            cell = self._cells[index]
+            profiler.start_cell(index)
             cell.animal_feeding()
+            profiler.lap('feeding', cell)
             cell.animal_breeding()
+            profiler.lap('breeding', cell)
             # Migration requires references to neighbouring cells
-            neighbours = [(row+1, col), (row, col+1), (row-1, col), (row, col-1)]
-            valid_cells = [n for loc in neighbours if (n := self._map.get(loc, None)) is not None]
-            cell.animal_migration(valid_cells)
+            cell.animal_migration(self._neighbours[index])
+            profiler.lap('migration', cell)
+            landing.update(self._landing[index])
+        return landing
 
-        for cell in self._map.values():
+    def _settle(self, landing):
+        """
+        :param landing: Indices of the cells to visit
+
+        Runs the second half of the year, arrival of migrants, ageing, weight loss and death,
+        and makes the cells still with animals the new active set.
+        """
+        profiler = self.profiler
+        self._active = set()
+        for index in sorted(landing):
+            cell = self._cells[index]
+            profiler.start_cell(index)
             cell.finish_animal_migration()
-            cell.animal_ageing()
-            cell.animal_weight_loss()
-            cell.animal_death()
+            profiler.lap('arrival', cell)
+            cell.animal_end_of_year()
+            profiler.lap('end_of_year', cell)
+            if cell.animals:
+                self._active.add(index)
+        self._recount()
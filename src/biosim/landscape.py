@@ -1,5 +1,9 @@
-import random
+import numpy as np
 from collections import Counter
+from itertools import compress, groupby
+from .animals import Animal
+from .parameters import compile_animal_parameters
+from .prey import PreyIndex
 
 
 class Landscape:
@@ -7,19 +11,24 @@ class Landscape:
     Represents single cell of the :ref:`island`, \
     containing the :ref:`animals` currently residing there.
     """
-    def __init__(self, land_type, param):
+    def __init__(self, land_type, param, rng=None):
         """
         :param land_type: Character specifying type of land
         :param param: A dict containing parameters for each type of land
+        :param rng: ``numpy.random.Generator`` for all random events in the cell.
+                    A new, randomly seeded one is made if not given.
         """
         self.param = param
         self.land_type = land_type
+        self.rng = rng if rng is not None else np.random.default_rng()
 
         if land_type not in param:
             raise ValueError("Unrecognized land type")
 
         self.animals = []
         self.incoming_animals = []
+        # Number of animals of each species in ``animals``, updated on every change
+        self.counts = Counter()
 
     @property
     def habitable(self):
@@ -32,24 +41,47 @@ class Landscape:
         :param param: Dict of animal parameters, that contains parameters for all species.
 
         Constructs all given animals and stores them in the landscape object.
+        The parameter dicts are compiled, see ``compile_animal_parameters``.
         """
+        param = compile_animal_parameters(param)
         for a in population:
             if not self.habitable:
                 raise ValueError("Can't add species to non-habitable landscape")
             species = a['species']
             new_animal = param[species]['constructor'](a['age'], a['weight'], param[species])
             self.animals.append(new_animal)
+            self.counts[species] += 1
 
     def get_count_of_species(self, species):
         """
         :param species: Name of one species.
         :type species: str
 
-        Counts number of animals that belong to the given species.
-
         :returns: Number of animals of the given species.
         """
-        return sum(a.species == species for a in self.animals)
+        return self.counts[species]
+
+    def species_counts(self):
+        """ :returns: Dict with the number of animals of each species present. """
+        return {species: count for species, count in self.counts.items() if count}
+
+    def species_attributes(self):
+        """
+        Collects the fitness, age and weight of all animals in one pass.
+
+        :returns: Dict with a tuple of three lists, fitness, ages and weights,
+                  for each species present.
+        """
+        Animal.refresh_fitness(self.animals)
+        attributes = {}
+        for a in self.animals:
+            if a.species not in attributes:
+                attributes[a.species] = ([], [], [])
+            fitness, ages, weights = attributes[a.species]
+            fitness.append(a.fitness)
+            ages.append(a.age)
+            weights.append(a.weight)
+        return attributes
 
     def species_fitness(self, species):
         return [a.fitness for a in self.animals if a.species == species]
@@ -71,23 +103,33 @@ class Landscape:
         See details in :ref:`herbivore` and :ref:`carnivore`.
 
         Preys that are eaten, are removed from the list of animals in the cell.
+        The prey is ranked by fitness in a ``PreyIndex``, once for all predators in the cell.
+
+        Each consecutive run of one species in eating order is fed by the species class'
+        ``feed_animals``, so herbivores graze in one vectorized step.
         """
         # Plant food
         fodder = self.param[self.land_type]['f_max']
 
-        # First shuffle animals to give random order, then sort by priority
-        random.shuffle(self.animals)
-        self.animals.sort(key=lambda a: a.eating_priority, reverse=True)
+        # First shuffle animals to give random order, then a stable sort by priority
+        Animal.refresh_fitness(self.animals)
+        priority = np.array([a.eating_priority for a in self.animals], dtype=float)
+        order = self.rng.permutation(len(self.animals))
+        order = order[np.argsort(-priority[order], kind='stable')]
+        self.animals = [self.animals[i] for i in order.tolist()]
 
-        # List of prey in the landscape
-        prey = [a for a in self.animals if a.is_prey]
+        # Prey in the landscape, ranked by fitness once and shared by all predators
+        prey = PreyIndex(a for a in self.animals if a.is_prey)
 
-        # Let each animal eat in turn, giving access to both plants and prey
-        for animal in self.animals:
-            fodder -= animal.feed(fodder, prey)
+        # Let each run of a species eat in turn, giving access to both plants and prey
+        for species, run in groupby(self.animals, key=type):
+            run = list(run)
+            fodder = species.feed_animals(run[0].para, run, fodder, prey, self.rng)
 
         # Remove all animals that were eaten
-        self.animals = [a for a in self.animals if a.weight > 0]
+        if eaten := [a.species for a in self.animals if a.weight <= 0]:
+            self.counts.subtract(eaten)
+            self.animals = [a for a in self.animals if a.weight > 0]
 
     def animal_breeding(self):
         """
@@ -96,14 +138,19 @@ class Landscape:
         the newborns are added to the list of animals.
 
         A newborn does not contribute to the species count until breeding is finished.
+        Random numbers for all animals are drawn in one block.
         """
-        species_count = Counter(a.species for a in self.animals)
+        species_count = self.counts.copy()
+        Animal.refresh_fitness(self.animals)
+        draws = self.rng.random(len(self.animals)).tolist()
+        normals = self.rng.standard_normal(len(self.animals)).tolist()
 
         new_animals = []
-        for a in self.animals:
-            if (child := a.try_give_birth(species_count)) is not None:
+        for a, draw, normal in zip(self.animals, draws, normals):
+            if (child := a.try_give_birth(species_count, draw, normal)) is not None:
                 new_animals.append(child)
         self.animals.extend(new_animals)
+        self.counts.update(a.species for a in new_animals)
 
     def animal_ageing(self):
         """ All animals get one year older. """
@@ -119,7 +166,24 @@ class Landscape:
         """
         Checks each animal if it happens to die this year. If so, removes it. See :ref:`animals`.
         """
-        self.animals = [a for a in self.animals if not a.death()]
+        Animal.refresh_fitness(self.animals)
+        draws = self.rng.random(len(self.animals)).tolist()
+        dead = [a.death(draw) for a, draw in zip(self.animals, draws)]
+        self.counts.subtract(a.species for a, d in zip(self.animals, dead) if d)
+        self.animals = [a for a, d in zip(self.animals, dead) if not d]
+
+    def animal_end_of_year(self):
+        """
+        Ageing, weight loss and death of all animals in one pass, see ``Animal.end_of_year``.
+        Gives the same outcome as ``animal_ageing``, ``animal_weight_loss`` and
+        ``animal_death`` in turn. The survivors are compacted in place in ``animals``.
+        """
+        if not self.animals:
+            return
+        dead = Animal.end_of_year(self.animals, self.rng.random(len(self.animals)))
+        if dead.any():
+            self.counts.subtract(a.species for a in compress(self.animals, dead))
+            self.animals[:] = compress(self.animals, ~dead)
 
     def animal_migration(self, neighbour_cells):
         """
@@ -132,7 +196,13 @@ class Landscape:
         This lets the incoming cell finish early simulation phases without the incoming animals.
         See ``finish_animal_migration``.
         """
-        self.animals = [a for a in self.animals if not a.try_migrate(neighbour_cells)]
+        Animal.refresh_fitness(self.animals)
+        draws = self.rng.random(len(self.animals)).tolist()
+        directions = self.rng.integers(len(neighbour_cells), size=len(self.animals)).tolist()
+        moved = [a.try_migrate(neighbour_cells, draw, direction)
+                 for a, draw, direction in zip(self.animals, draws, directions)]
+        self.counts.subtract(a.species for a, m in zip(self.animals, moved) if m)
+        self.animals = [a for a, m in zip(self.animals, moved) if not m]
 
     def try_accept_migrating_animal(self, animal):
         """
@@ -158,4 +228,5 @@ class Landscape:
         making the new animals take part in all future simulation-steps on this cell.
         """
         self.animals.extend(self.incoming_animals)
+        self.counts.update(a.species for a in self.incoming_animals)
         self.incoming_animals.clear()
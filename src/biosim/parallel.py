@@ -0,0 +1,402 @@
+import multiprocessing
+import pickle
+import weakref
+from collections import Counter
+import numpy as np
+from .island import Island
+from .landscape import Landscape
+from .population import Population
+from .snapshot import Snapshot
+
+
+class Tile(Island):
+    """
+    A band of rows of an island, simulated by one worker process of a ``ParallelIsland``.
+
+    The grid of the tile holds the rows it owns, plus a ghost row above and below
+    where the island continues in the neighbouring tiles. Ghost cells are empty copies of
+    the neighbour's cells. Animals migrating into them are sent on to the neighbour tile.
+    """
+
+    def __init__(self, island, first, last, animal_parameters):
+        """
+        :param island: The whole ``Island``, with the cells the tile takes over
+        :param first: Index of the first row owned by the tile, counted from 0
+        :param last: Index of the last row owned by the tile
+        :param animal_parameters: Dict of animal parameters, shared by all animals of the tile
+        """
+        # The cells are taken over from the island, instead of made from a map
+        self._init_state(island.land_parameters, island.cell_type, island.rng, True)
+        rows, cols = island.shape
+        self.first, self.last = first, last
+        self.top = max(first - 1, 0)
+        bottom = min(last + 1, rows - 1)
+
+        self.animal_parameters = animal_parameters
+        self.shape = (bottom - self.top + 1, cols)
+        self.land_types = island.land_types
+        self.land_codes = island.land_codes[first:last + 1]
+
+        own_start, own_stop = first * cols, (last + 1) * cols
+        self._cells = [cell if own_start <= index < own_stop
+                       else self.cell_type(cell.land_type, self.land_parameters, self.rng)
+                       for index, cell in enumerate(island._cells[self.top * cols:
+                                                                  (bottom + 1) * cols],
+                                                    self.top * cols)]
+        offset = self.top * cols
+        self._own = range(own_start - offset, own_stop - offset)
+        self._ghosts_above = range(0, self._own.start)
+        self._ghosts_below = range(self._own.stop, len(self._cells))
+        self._active = {index - offset for index in island._active
+                        if own_start <= index < own_stop}
+        self._landing_now = set()
+        self._build_tables()
+        self._recount()
+
+    def _index(self, loc):
+        """ :returns: Index into the tile grid of the ``(row, col)`` location on the island. """
+        row, col = loc
+        return (row - 1 - self.top) * self.shape[1] + (col - 1)
+
+    def _location(self, index):
+        """ :returns: The ``(row, col)`` location on the island of the tile grid index. """
+        row, col = divmod(index, self.shape[1])
+        return row + self.top + 1, col + 1
+
+    def add_populations(self, populations, parameters):
+        """ See ``Island.add_populations``. :returns: The new species counts of the tile. """
+        if self.animal_parameters is None:
+            self.animal_parameters = parameters
+        super().add_populations(populations, self.animal_parameters)
+        return self.species_counts()
+
+    def cell_population(self, species):
+        """ See ``Island.cell_population``, for the owned cells. """
+        return {self._location(index): self._cells[index].get_count_of_species(species)
+                for index in self._own}
+
+    def density(self, species, out=None):
+        """ See ``Island.density``, for the owned rows only. """
+        if out is None:
+            out = np.zeros((len(species), self.last - self.first + 1, self.shape[1]), dtype=int)
+        return self._fill_density(species, out, self._own.start)
+
+    def snapshot(self, species, year=None, attributes=True):
+        """ See ``Island.snapshot``, with densities for the owned rows only. """
+        snapshot = super().snapshot(species, year, attributes)
+        rows = slice(self.first - self.top, self.last - self.top + 1)
+        snapshot.density = {s: density[rows] for s, density in snapshot.density.items()}
+        return snapshot
+
+    def feed_breed_migrate(self, animal_parameters, land_parameters):
+        """
+        :param animal_parameters: The current animal parameters of the island
+        :param land_parameters: The current land parameters of the island
+
+        Updates the parameters in place, and runs the first half of the year.
+
+        :returns: Pickled migrants for the tile above and for the tile below,
+                  as lists of ``(col, incoming_animals)``.
+        """
+        if animal_parameters is not None and self.animal_parameters is not None:
+            for species, para in animal_parameters.items():
+                self.animal_parameters.setdefault(species, {}).update(para)
+        for land_type, para in land_parameters.items():
+            self.land_parameters[land_type].update(para)
+
+        self._landing_now = self._feed_breed_migrate()
+        return self._export(self._ghosts_above), self._export(self._ghosts_below)
+
+    def _export(self, ghosts):
+        """ Takes the incoming animals out of the ghost cells, pickled in one batch. """
+        migrants = []
+        for index in ghosts:
+            cell = self._cells[index]
+            if cell.incoming_animals:
+                migrants.append((index % self.shape[1], cell.incoming_animals))
+                cell.incoming_animals = []
+        return pickle.dumps(migrants)
+
+    def settle(self, from_previous, from_next):
+        """
+        :param from_previous: Pickled migrants into the first row, from the tile above
+        :param from_next: Pickled migrants into the last row, from the tile below
+
+        Adds the migrants from the neighbour tiles, and runs the second half of the year.
+        Migrants from above are put first and migrants from below last, as if the
+        whole island was simulated in grid order.
+
+        :returns: The species counts of the tile, and the number of cells visited.
+        """
+        cols = self.shape[1]
+        for migrants, row, first in ((from_previous, self.first, True),
+                                     (from_next, self.last, False)):
+            if migrants is None:
+                continue
+            for col, animals in pickle.loads(migrants):
+                _rebind(animals, self.animal_parameters)
+                index = (row - self.top) * cols + col
+                incoming = self._cells[index].incoming_animals
+                if first:
+                    incoming[:0] = animals
+                else:
+                    incoming.extend(animals)
+                self._landing_now.add(index)
+
+        landing = {index for index in self._landing_now if index in self._own}
+        self._settle(landing)
+        return self.species_counts(), len(landing)
+
+    def owned_cells(self):
+        """ :returns: The cells owned by the tile, in grid order, and the animal parameters. """
+        return [self._cells[index] for index in self._own], self.animal_parameters
+
+
+def _rebind(animals, parameters):
+    """
+    :param animals: List of ``Animal``, or of ``Population``
+    :param parameters: Dict of animal parameters
+
+    Makes unpickled animals use the given parameter dicts, instead of their own copies.
+    """
+    for chunk in animals:
+        if isinstance(chunk, Population):
+            chunk.parameters = parameters
+        else:
+            chunk.para = parameters[chunk.species]
+
+
+def _serve(connection, tile):
+    """
+    Runs in a worker process. Calls the requested methods of the tile,
+    and sends back the result, or the exception raised.
+    """
+    while True:
+        method, *args = connection.recv()
+        if method is None:
+            break
+        try:
+            result = getattr(tile, method)(*args)
+        except Exception as error:
+            result = error
+        connection.send(result)
+    connection.close()
+
+
+def _stop(connections, processes):
+    """ Stops the worker processes. """
+    for connection in connections:
+        try:
+            connection.send((None,))
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+class ParallelIsland(Island):
+    """
+    An ``Island`` simulated by a pool of worker processes, each owning a band of rows.
+
+    Every cell has its own random generator, and migrants crossing between bands are exchanged
+    in one batch per pair of neighbouring bands and year. The result of a given seed is the
+    same for any number of workers.
+    """
+
+    def __init__(self, landscape, land_parameters, cell_type=Landscape, rng=None, workers=2):
+        """
+        :param workers: Number of worker processes, at most one per map row
+
+        See ``Island`` for the other parameters.
+        The workers are started when the first year is simulated.
+        Until then, the island is a plain ``Island`` in this process.
+        """
+        super().__init__(landscape, land_parameters, cell_type, rng, cell_streams=True)
+        if workers < 1:
+            raise ValueError("Need at least one worker")
+        self.workers = workers
+        self.animal_parameters = None
+        self._bands = []
+        self._connections = []
+        self._stopper = None
+
+    @property
+    def started(self):
+        """ True when the cells have moved into the worker processes. """
+        return bool(self._connections)
+
+    def _start(self):
+        """ Splits the rows into bands, and starts one worker process per band. """
+        rows = self.shape[0]
+        bounds = np.linspace(0, rows, min(self.workers, rows) + 1).round().astype(int).tolist()
+        self._bands = [(first, last - 1) for first, last in zip(bounds[:-1], bounds[1:])]
+
+        context = multiprocessing.get_context()
+        processes = []
+        for first, last in self._bands:
+            ours, theirs = context.Pipe()
+            tile = Tile(self, first, last, self.animal_parameters)
+            process = context.Process(target=_serve, args=(theirs, tile), daemon=True)
+            process.start()
+            theirs.close()
+            self._connections.append(ours)
+            processes.append(process)
+        self._stopper = weakref.finalize(self, _stop, self._connections, processes)
+
+        # The cells now live in the workers
+        self._cells, self._neighbours, self._landing = [], [], []
+        self._active = set()
+
+    def __getstate__(self):
+        """
+        Pickles the island as a plain, not started ``ParallelIsland``.
+        If started, the cells are first collected from the workers.
+        """
+        state = self.__dict__.copy()
+        if self.started:
+            cells = []
+            for tile_cells, _ in self._call_all('owned_cells'):
+                for cell in tile_cells:
+                    cell.param = self.land_parameters
+                    _rebind([cell.animals] if isinstance(cell.animals, Population)
+                            else cell.animals, self.animal_parameters)
+                cells.extend(tile_cells)
+            state['_cells'] = cells
+            state['_neighbours'] = state['_landing'] = None
+            state['_active'] = {index for index, cell in enumerate(cells) if cell.animals}
+        state.update(_bands=[], _connections=[], _stopper=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._neighbours is None:
+            self._build_tables()
+
+    def close(self):
+        """ Stops the worker processes. The animals on the island are lost. """
+        if self._stopper is not None:
+            self._stopper()
+
+    def _call(self, calls):
+        """
+        :param calls: Dict with a tuple of method name and arguments per band index
+        :returns: Dict with the result of each call, raising any exception from a worker
+        """
+        for band, call in calls.items():
+            self._connections[band].send(call)
+        results = {band: self._connections[band].recv() for band in calls}
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    def _call_all(self, method, *args):
+        """ :returns: List with the result of calling the method on every tile, in row order. """
+        results = self._call({band: (method, *args) for band in range(len(self._bands))})
+        return [results[band] for band in range(len(self._bands))]
+
+    def _sum_counts(self, counts):
+        self._counts = Counter()
+        for tile_counts in counts:
+            self._counts.update(tile_counts)
+
+    def cell(self, loc):
+        """ See ``Island.cell``. Only available until the workers have started. """
+        if self.started:
+            raise RuntimeError("The cells live in the worker processes")
+        return super().cell(loc)
+
+    def add_populations(self, populations, parameters):
+        """ See ``Island.add_populations``. """
+        if self.animal_parameters is None:
+            self.animal_parameters = parameters
+        if not self.started:
+            return super().add_populations(populations, parameters)
+
+        calls = {}
+        for population in populations:
+            row = self._index(population['loc']) // self.shape[1]
+            band = next(b for b, (first, last) in enumerate(self._bands) if first <= row <= last)
+            calls.setdefault(band, ('add_populations', [], parameters))[1].append(population)
+        self._call(calls)
+        self._sum_counts(self._call_all('species_counts'))
+
+    def cell_population(self, species):
+        """ See ``Island.cell_population``. """
+        if not self.started:
+            return super().cell_population(species)
+        population = {}
+        for tile_population in self._call_all('cell_population', species):
+            population.update(tile_population)
+        return population
+
+    def species_fitness(self, species):
+        if not self.started:
+            return super().species_fitness(species)
+        return [f for tile_fitness in self._call_all('species_fitness', species)
+                for f in tile_fitness]
+
+    def species_ages(self, species):
+        if not self.started:
+            return super().species_ages(species)
+        return [a for tile_ages in self._call_all('species_ages', species) for a in tile_ages]
+
+    def species_weights(self, species):
+        if not self.started:
+            return super().species_weights(species)
+        return [w for tile_weights in self._call_all('species_weights', species)
+                for w in tile_weights]
+
+    def density(self, species, out=None):
+        """ See ``Island.density``. Each worker counts its own rows. """
+        if not self.started:
+            return super().density(species, out)
+        parts = self._call_all('density', species)
+        if out is None:
+            return np.concatenate(parts, axis=1)
+        return np.concatenate(parts, axis=1, out=out)
+
+    def histograms(self, histograms):
+        """ See ``Island.histograms``. Each worker counts its own rows. """
+        if not self.started:
+            return super().histograms(histograms)
+        histograms.reset()
+        for part in self._call_all('histograms', histograms):
+            histograms.merge(part)
+        return histograms
+
+    def snapshot(self, species, year=None, attributes=True):
+        """ See ``Island.snapshot``. Each worker gathers the snapshot of its own rows. """
+        if not self.started:
+            return super().snapshot(species, year, attributes)
+        parts = self._call_all('snapshot', species, year, attributes)
+        return Snapshot(year, {s: self._counts[s] for s in species},
+                        {s: np.vstack([part.density[s] for part in parts]) for s in species},
+                        {s: np.concatenate([part.fitness[s] for part in parts]) for s in species},
+                        {s: np.concatenate([part.age[s] for part in parts]) for s in species},
+                        {s: np.concatenate([part.weight[s] for part in parts]) for s in species})
+
+    def simulate_year(self):
+        """
+        Simulates one year, with every worker simulating its own rows.
+
+        The current parameters are sent to the workers each year, so parameter changes
+        between years take effect. After feeding, breeding and migration, the migrants
+        into neighbouring bands are passed on, then all workers finish the year.
+
+        ``profiler`` only records the time of the whole year.
+        """
+        if not self.started:
+            self._start()
+        self.profiler.start_year()
+        exports = self._call_all('feed_breed_migrate', self.animal_parameters,
+                                 self.land_parameters)
+        last = len(self._bands) - 1
+        results = self._call({band: ('settle',
+                                     exports[band - 1][1] if band > 0 else None,
+                                     exports[band + 1][0] if band < last else None)
+                              for band in range(len(self._bands))})
+        self._sum_counts(results[band][0] for band in range(len(self._bands)))
+        self.profiler.end_year(sum(visited for _, visited in results.values()), self._location)
@@ -2,6 +2,87 @@ from .herbivore import Herbivore
 from .carnivore import Carnivore
 
 
+class SpeciesParameters(dict):
+    """
+    The parameters of one species, as a dict compiled for the hot paths of the simulation.
+
+    Every parameter can also be read as an attribute, e.g. ``para.phi_age``,
+    and derived constants are calculated once:
+
+    - ``birth_weight_min``: The lowest weight for giving birth,
+      :math:`\\zeta(w_\\text{birth} + \\sigma_\\text{birth})`.
+
+    The attributes are compiled again whenever a parameter changes,
+    e.g. by ``BioSim.set_animal_parameters``, and are never out of date.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compile()
+
+    def _compile(self):
+        self.__dict__.clear()
+        self.__dict__.update(self)
+        if 'zeta' in self and 'w_birth' in self and 'sigma_birth' in self:
+            self.birth_weight_min = self['zeta'] * (self['w_birth'] + self['sigma_birth'])
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._compile()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._compile()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._compile()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self._compile()
+        return value
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._compile()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._compile()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._compile()
+
+    def copy(self):
+        return SpeciesParameters(self)
+
+    def __reduce__(self):
+        return SpeciesParameters, (dict(self),)
+
+
+def compile_animal_parameters(parameters):
+    """
+    :param parameters: Dict with the parameter dict of each species
+
+    Compiles the parameters once, where they enter the simulation, e.g. in
+    ``Landscape.add_population``. Parameters already compiled are kept, so changing them
+    also changes the values used by the animals. A plain dict is compiled into a copy,
+    and later changes to it are not seen. The given dict is not changed.
+
+    :returns: New dict with a ``SpeciesParameters`` for each species
+    """
+    return {species: para if isinstance(para, SpeciesParameters) else SpeciesParameters(para)
+            for species, para in parameters.items()}
+
+
 default_animal_parameters = {
     'Herbivore': {
         'w_birth': 8.,
@@ -41,6 +122,7 @@ default_animal_parameters = {
         'constructor': Carnivore
     }
 }
+default_animal_parameters = compile_animal_parameters(default_animal_parameters)
 
 
 # Upper limit on beta added by us (should not gain more weight than eaten).
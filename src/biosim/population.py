@@ -0,0 +1,459 @@
+from bisect import bisect_right
+import numpy as np
+from .fitness import fitness
+from .landscape import Landscape
+from .parameters import compile_animal_parameters
+
+
+class Population:
+    """
+    The animals of one landscape cell, stored as contiguous NumPy arrays
+    instead of one ``Animal`` object per animal.
+
+    Index ``i`` of ``species``, ``age``, ``weight`` and ``fitness`` describes the same animal.
+    Species are stored as indices into the keys of the animal parameter dict,
+    which is bound when the first animals are added.
+
+    ``fitness`` is a cache. Whoever changes the age or weight of an animal must mark it in
+    ``dirty``, and ``update_fitness`` recalculates only the marked animals.
+
+    ``counts`` holds the number of animals of each species code. It is updated by
+    ``_append`` and ``keep``, which every change of the animals goes through.
+    """
+
+    def __init__(self):
+        self.parameters = None
+        self.names = []
+        self.species = np.empty(0, dtype=np.int16)
+        self.age = np.empty(0, dtype=np.int32)
+        self.weight = np.empty(0, dtype=float)
+        self.fitness = np.empty(0, dtype=float)
+        self.dirty = np.empty(0, dtype=bool)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self._prey = None
+
+    def __len__(self):
+        return len(self.species)
+
+    def _bind(self, parameters):
+        """ Binds the animal parameter dict, which defines the species codes. """
+        if self.parameters is None:
+            self.parameters = compile_animal_parameters(parameters)
+            self.names = list(parameters)
+            self.counts = np.zeros(len(self.names), dtype=np.int64)
+
+    def add(self, population, parameters):
+        """
+        :param population: List of dictionaries with species, age and weight as keys.
+        :param parameters: Dict of animal parameters, that contains parameters for all species.
+
+        Appends the given animals. Raises ``ValueError`` on invalid starting conditions,
+        like the ``Animal`` constructor does.
+        """
+        self._bind(parameters)
+        if any(a['age'] < 0 or a['weight'] <= 0 for a in population):
+            raise ValueError("Invalid starting conditions of an animal")
+        species = np.array([self.names.index(a['species']) for a in population], dtype=np.int16)
+        age = np.array([a['age'] for a in population], dtype=np.int32)
+        weight = np.array([a['weight'] for a in population], dtype=float)
+        self._append(species, age, weight)
+
+    def extend(self, other):
+        """ Moves all animals from another ``Population`` into this one. """
+        if len(other) == 0:
+            return
+        self._bind(other.parameters)
+        self._append(other.species, other.age, other.weight, other.fitness, other.dirty)
+
+    def _append(self, species, age, weight, cached_fitness=None, dirty=None):
+        """ Appends animals, with their fitness marked as dirty unless a cache is given. """
+        if cached_fitness is None:
+            cached_fitness = np.zeros(len(species))
+            dirty = np.ones(len(species), dtype=bool)
+        self.species = np.concatenate((self.species, species))
+        self.age = np.concatenate((self.age, age))
+        self.weight = np.concatenate((self.weight, weight))
+        self.fitness = np.concatenate((self.fitness, cached_fitness))
+        self.dirty = np.concatenate((self.dirty, dirty))
+        self.counts += np.bincount(species, minlength=len(self.names))
+
+    def keep(self, mask):
+        """
+        Removes every animal where ``mask`` is False.
+
+        The arrays are compacted in place: the animals kept after the first removed one
+        are moved forward, and the arrays are shortened to views of their first part.
+        """
+        removed = np.flatnonzero(~mask)
+        if len(removed) == 0:
+            return
+        self.counts -= np.bincount(self.species[removed], minlength=len(self.names))
+        first = removed[0]
+        kept = first + np.flatnonzero(mask[first:])
+        size = first + len(kept)
+        for name in ('species', 'age', 'weight', 'fitness', 'dirty'):
+            column = getattr(self, name)
+            column[first:size] = column[kept]
+            setattr(self, name, column[:size])
+
+    def subset(self, mask):
+        """ :returns: A new ``Population`` with copies of the animals where ``mask`` is True. """
+        part = Population()
+        part._bind(self.parameters)
+        part.species = self.species[mask]
+        part.age = self.age[mask]
+        part.weight = self.weight[mask]
+        part.fitness = self.fitness[mask]
+        part.dirty = self.dirty[mask]
+        part.counts = np.bincount(part.species, minlength=len(self.names))
+        return part
+
+    def para(self, code):
+        """ :returns: The parameter dict of the species with the given code. """
+        return self.parameters[self.names[code]]
+
+    def per_animal(self, param):
+        """ :returns: Array with the value of ``param`` for the species of each animal. """
+        values = np.array([self.parameters[name][param] for name in self.names])
+        return values[self.species]
+
+    def species_codes(self):
+        """ :returns: The codes of all species with at least one animal present. """
+        return np.unique(self.species).tolist()
+
+    def update_fitness(self):
+        """
+        Recalculates the fitness of the animals marked in ``dirty``,
+        in one vectorized pass per species. Every season calls this before reading ``fitness``,
+        so the fitness of an animal is calculated at most once per season.
+        """
+        stale = np.flatnonzero(self.dirty)
+        if len(stale) == 0:
+            return
+        species = self.species[stale]
+        for code in np.unique(species).tolist():
+            members = stale[species == code]
+            self.fitness[members] = fitness(self.para(code), self.age[members],
+                                            self.weight[members])
+        self.dirty[stale] = False
+
+    def count(self, species):
+        """ :returns: Number of animals of the named species. """
+        if species not in self.names:
+            return 0
+        return int(self.counts[self.names.index(species)])
+
+    def species_counts(self):
+        """ :returns: Dict with the number of animals of each species. """
+        return dict(zip(self.names, self.counts.tolist()))
+
+    def values(self, species, attribute):
+        """
+        :param species: Name of one species
+        :param attribute: One of ``'fitness'``, ``'age'`` or ``'weight'``
+
+        :returns: Array with the attribute of every animal of the named species.
+        """
+        if species not in self.names:
+            return np.empty(0)
+        if attribute == 'fitness':
+            self.update_fitness()
+        return getattr(self, attribute)[self.species == self.names.index(species)]
+
+    def attributes(self):
+        """ :returns: Dict with arrays of fitness, age and weight for each species present. """
+        self.update_fitness()
+        attributes = {}
+        for code in self.species_codes():
+            members = self.species == code
+            attributes[self.names[code]] = (self.fitness[members], self.age[members],
+                                            self.weight[members])
+        return attributes
+
+    def prey_table(self):
+        """
+        :returns: The ``PreyTable`` of the ongoing feeding phase,
+                  built on the first request after all grazers have eaten.
+        """
+        if self._prey is None:
+            self.update_fitness()
+            self._prey = PreyTable(self)
+        return self._prey
+
+    # 1. feeding
+    def feed(self, fodder, rng):
+        """
+        :param fodder: The amount of plant fodder available in the cell
+        :param rng: ``numpy.random.Generator`` of the cell
+
+        Same ordering as ``Landscape.animal_feeding``: a random shuffle,
+        then a stable sort by decreasing eating priority.
+        Each consecutive run of one species in this order is fed by the species class'
+        ``feed_population``, so herbivores eat in one vectorized step.
+        Eaten prey is removed.
+        """
+        if len(self) == 0:
+            return
+        self.update_fitness()
+
+        priority = np.empty(len(self))
+        for code in self.species_codes():
+            members = self.species == code
+            priority[members] = self.para(code).constructor.eating_priorities(
+                self.fitness[members])
+        order = rng.permutation(len(self))
+        order = order[np.argsort(-priority[order], kind='stable')]
+
+        self._prey = None
+        run_starts = np.flatnonzero(np.diff(self.species[order])) + 1
+        for members in np.split(order, run_starts):
+            para = self.para(self.species[members[0]])
+            fodder -= para.constructor.feed_population(para, self, members, fodder, rng)
+
+        if self._prey is not None:
+            self.weight[self._prey.eaten()] = 0
+            self._prey = None
+            self.keep(self.weight > 0)
+
+    # 2. procreation
+    def breed(self, rng):
+        """
+        :param rng: ``numpy.random.Generator`` of the cell
+
+        Vectorized ``Animal.try_give_birth`` for all animals, with the species counts taken
+        before any births. Newborns are appended after all parents have tried.
+        """
+        if len(self) == 0:
+            return
+        self.update_fitness()
+        counts = self.counts.copy()
+
+        newborn_species, newborn_weight = [], []
+        for code in self.species_codes():
+            members = np.flatnonzero(self.species == code)
+            para = self.para(code)
+            fertile = para.constructor.fertile(para, self.age[members], self.weight[members])
+            p = np.minimum(1.0, para.gamma * self.fitness[members] * (counts[code] - 1))
+            draw = rng.random(len(members))
+            birth_weight = rng.normal(para.w_birth, para.sigma_birth, len(members))
+            weight_loss = para.xi * birth_weight
+            born = (fertile & (draw <= p) & (weight_loss < self.weight[members])
+                    & (birth_weight > 0))
+            self.weight[members[born]] -= weight_loss[born]
+            self.dirty[members[born]] = True
+            newborn_species.append(np.full(np.count_nonzero(born), code, dtype=np.int16))
+            newborn_weight.append(birth_weight[born])
+
+        newborn_weight = np.concatenate(newborn_weight)
+        self._append(np.concatenate(newborn_species),
+                     np.zeros(len(newborn_weight), dtype=np.int32), newborn_weight)
+
+    # 3. migration
+    def migrate(self, neighbour_cells, rng):
+        """
+        :param neighbour_cells: A list of all neighbour cells (must not be empty)
+        :param rng: ``numpy.random.Generator`` of the cell
+
+        Vectorized ``Animal.try_migrate``. Migrating animals pick a neighbour at random,
+        and move into its ``incoming_animals`` if it accepts them.
+        """
+        if len(self) == 0:
+            return
+        self.update_fitness()
+        moving = rng.random(len(self)) < self.per_animal('mu') * self.fitness
+        if not moving.any():
+            return
+
+        target = rng.integers(len(neighbour_cells), size=len(self))
+        stay = ~moving
+        for direction, cell in enumerate(neighbour_cells):
+            leaving = moving & (target == direction)
+            if leaving.any() and not cell.try_accept_migrating_population(self.subset(leaving)):
+                stay |= leaving
+        self.keep(stay)
+
+    # 4. ageing
+    def ageing(self):
+        """ All animals get one year older. """
+        self.age += 1
+        self.dirty[:] = True
+
+    # 5. loss of weight
+    def weight_loss(self):
+        """ All animals lose the fraction :math:`\\eta` of their weight. """
+        self.weight -= self.per_animal('eta') * self.weight
+        self.dirty[:] = True
+
+    # 6. death
+    def death(self, rng):
+        """
+        :param rng: ``numpy.random.Generator`` of the cell
+
+        Removes animals without weight, and unlucky animals, see ``Animal.death``.
+        """
+        if len(self) == 0:
+            return
+        self.update_fitness()
+        draw = rng.random(len(self))
+        dead = (self.weight <= 0) | (draw < self.per_animal('omega') * (1.0 - self.fitness))
+        self.keep(~dead)
+
+    # 4-6. ageing, loss of weight and death
+    def end_of_year(self, rng):
+        """
+        :param rng: ``numpy.random.Generator`` of the cell
+
+        ``ageing``, ``weight_loss`` and ``death`` in one pass, with the same outcome.
+        The fitness is calculated once, after ageing and weight loss,
+        and is kept for the survivors, which are compacted in place by ``keep``.
+        """
+        if len(self) == 0:
+            return
+        self.age += 1
+        self.weight -= self.per_animal('eta') * self.weight
+        self.dirty[:] = True
+        self.update_fitness()
+        draw = rng.random(len(self))
+        dead = (self.weight <= 0) | (draw < self.per_animal('omega') * (1.0 - self.fitness))
+        self.keep(~dead)
+
+
+class PreyTable:
+    """
+    Living prey of one cell during a feeding phase, ordered by increasing fitness.
+    Built once per cell and shared by every predator, instead of sorting once per predator.
+    Predators mark eaten prey in ``alive``, the weights are written back after feeding.
+    Array version of ``PreyIndex``, see :ref:`landscape`.
+    """
+
+    def __init__(self, population):
+        """ :param population: The ``Population`` of the cell """
+        is_prey = np.array([population.parameters[name].prey for name in population.names],
+                           dtype=bool)
+        index = np.flatnonzero(is_prey[population.species] & (population.weight > 0))
+        self.index = index[np.argsort(population.fitness[index], kind='stable')]
+        self.fitness = population.fitness[self.index].tolist()
+        self.weight = population.weight[self.index].tolist()
+        self.alive = [True] * len(self.index)
+        self._low = 0
+        self._high = len(self.index)
+
+    def __len__(self):
+        return len(self.alive)
+
+    def weakest_first(self):
+        """ Yields the table positions of living prey, from lowest to highest fitness. """
+        alive = self.alive
+        # Prey eaten at the weak end is never visited again
+        while self._low < self._high and not alive[self._low]:
+            self._low += 1
+        for j in range(self._low, self._high):
+            if alive[j]:
+                yield j
+
+    def fittest_first(self, max_fitness=float('inf')):
+        """
+        :param max_fitness: Skip all prey with a higher fitness than this
+
+        Yields the table positions of living prey with fitness up to ``max_fitness``,
+        from highest to lowest fitness.
+        """
+        alive = self.alive
+        # Prey eaten at the fit end is never visited again
+        while self._high > self._low and not alive[self._high - 1]:
+            self._high -= 1
+        start = min(self._high, bisect_right(self.fitness, max_fitness))
+        for j in range(start - 1, self._low - 1, -1):
+            if alive[j]:
+                yield j
+
+    def eaten(self):
+        """ :returns: Population indices of all prey that was eaten. """
+        return self.index[~np.array(self.alive, dtype=bool)]
+
+
+class PopulationLandscape(Landscape):
+    """
+    Landscape cell storing its animals in a ``Population`` rather than a list of ``Animal``.
+    Used by ``BioSim`` with ``backend='arrays'``. Each season runs on whole arrays.
+    """
+
+    def __init__(self, land_type, param, rng=None):
+        """
+        :param land_type: Character specifying type of land
+        :param param: A dict containing parameters for each type of land
+        :param rng: ``numpy.random.Generator`` for all random events in the cell
+        """
+        super().__init__(land_type, param, rng)
+        self.animals = Population()
+
+    def add_population(self, population, param):
+        """ See ``Landscape.add_population``. """
+        if population and not self.habitable:
+            raise ValueError("Can't add species to non-habitable landscape")
+        self.animals.add(population, param)
+
+    def get_count_of_species(self, species):
+        """ See ``Landscape.get_count_of_species``. """
+        return self.animals.count(species)
+
+    def species_counts(self):
+        """ See ``Landscape.species_counts``. """
+        return self.animals.species_counts()
+
+    def species_attributes(self):
+        """ See ``Landscape.species_attributes``, but with NumPy arrays. """
+        return self.animals.attributes()
+
+    def species_fitness(self, species):
+        return self.animals.values(species, 'fitness').tolist()
+
+    def species_ages(self, species):
+        return self.animals.values(species, 'age').tolist()
+
+    def species_weights(self, species):
+        return self.animals.values(species, 'weight').tolist()
+
+    def animal_feeding(self):
+        """ See ``Landscape.animal_feeding`` and ``Population.feed``. """
+        self.animals.feed(self.param[self.land_type]['f_max'], self.rng)
+
+    def animal_breeding(self):
+        """ See ``Landscape.animal_breeding`` and ``Population.breed``. """
+        self.animals.breed(self.rng)
+
+    def animal_ageing(self):
+        self.animals.ageing()
+
+    def animal_weight_loss(self):
+        self.animals.weight_loss()
+
+    def animal_death(self):
+        self.animals.death(self.rng)
+
+    def animal_end_of_year(self):
+        """ See ``Landscape.animal_end_of_year`` and ``Population.end_of_year``. """
+        self.animals.end_of_year(self.rng)
+
+    def animal_migration(self, neighbour_cells):
+        """ See ``Landscape.animal_migration`` and ``Population.migrate``. """
+        self.animals.migrate(neighbour_cells, self.rng)
+
+    def try_accept_migrating_population(self, population):
+        """
+        :param population: ``Population`` of animals moving here
+
+        Array version of ``Landscape.try_accept_migrating_animal``.
+
+        :returns: True if this cell is habitable, and now has the animals
+        """
+        if not self.habitable:
+            return False
+        self.incoming_animals.append(population)
+        return True
+
+    def finish_animal_migration(self):
+        """ See ``Landscape.finish_animal_migration``. """
+        for population in self.incoming_animals:
+            self.animals.extend(population)
+        self.incoming_animals.clear()
@@ -0,0 +1,64 @@
+from bisect import bisect_right
+from .animals import Animal
+
+
+class PreyIndex:
+    """
+    The prey of one cell during a feeding season, ranked by increasing fitness.
+
+    ``Landscape.animal_feeding`` builds one index per cell and shares it between all predators,
+    so the prey is sorted once per cell instead of once per predator.
+    Eaten prey (weight zero) is skipped lazily, and dropped the next time the prey is ranked.
+    Ranking is only redone after ``invalidate``, when the fitness of some prey may have changed.
+    """
+
+    def __init__(self, prey):
+        """ :param prey: Iterable of prey animals """
+        self._prey = list(prey)
+        self._fitness = []
+        self._low = 0
+        self._high = 0
+        self._ranked = False
+
+    def invalidate(self):
+        """ Call after the fitness of some prey may have changed, e.g. when prey has eaten. """
+        self._ranked = False
+
+    def _rank(self):
+        """ Drops eaten prey, and sorts the rest by fitness. """
+        living = [p for p in self._prey if p.weight > 0]
+        Animal.refresh_fitness(living)
+        living.sort(key=lambda p: p.fitness)
+        self._prey = living
+        self._fitness = [p.fitness for p in living]
+        self._low, self._high = 0, len(living)
+        self._ranked = True
+
+    def weakest_first(self):
+        """ Yields the living prey, from lowest to highest fitness. """
+        if not self._ranked:
+            self._rank()
+        prey = self._prey
+        # Prey eaten at the weak end is never visited again
+        while self._low < self._high and prey[self._low].weight <= 0:
+            self._low += 1
+        for i in range(self._low, self._high):
+            if prey[i].weight > 0:
+                yield prey[i]
+
+    def fittest_first(self, max_fitness=float('inf')):
+        """
+        :param max_fitness: Skip all prey with a higher fitness than this
+
+        Yields the living prey with fitness up to ``max_fitness``, from highest to lowest fitness.
+        """
+        if not self._ranked:
+            self._rank()
+        prey = self._prey
+        # Prey eaten at the fit end is never visited again
+        while self._high > self._low and prey[self._high - 1].weight <= 0:
+            self._high -= 1
+        start = min(self._high, bisect_right(self._fitness, max_fitness))
+        for i in range(start - 1, self._low - 1, -1):
+            if prey[i].weight > 0:
+                yield prey[i]
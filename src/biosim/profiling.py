@@ -0,0 +1,109 @@
+import heapq
+import json
+from time import perf_counter
+
+
+class PhaseProfiler:
+    """
+    Records where the time of each simulated year goes.
+
+    ``Island.simulate_year`` reports to the profiler after every season of every cell.
+    For each year, the profiler keeps a record with
+
+    - ``year``: The year simulated.
+    - ``seconds``: Wall time of the whole year.
+    - ``phases``: Wall time spent in each phase, summed over the cells.
+    - ``animals``: Number of animals in the visited cells after each phase.
+    - ``cells``: Number of cells visited in the second half of the year.
+    - ``hot_cells``: The cells that took the longest, as ``{'loc': (row, col), 'seconds': t}``.
+
+    The records are plain dicts, lists and numbers, ready to be exported as JSON.
+    The cost is a couple of clock readings per season and cell.
+    """
+
+    phases = ('feeding', 'breeding', 'migration', 'arrival', 'end_of_year')
+
+    def __init__(self, hot_cells=5, year=0):
+        """
+        :param hot_cells: Number of the slowest cells to keep in each record
+        :param year: The last year simulated before profiling starts
+        """
+        self.hot_cells = hot_cells
+        self.year = year
+        self.records = []
+
+        self._start = None
+        self._last = None
+        self._cell = None
+        self._seconds = {}
+        self._animals = {}
+        self._cell_seconds = {}
+
+    def start_year(self):
+        """ Starts the record of the next year. """
+        self.year += 1
+        self._seconds = dict.fromkeys(self.phases, 0.0)
+        self._animals = dict.fromkeys(self.phases, 0)
+        self._cell_seconds = {}
+        self._start = perf_counter()
+
+    def start_cell(self, index):
+        """ :param index: Grid index of the cell whose seasons follow """
+        self._cell = index
+        self._last = perf_counter()
+
+    def lap(self, phase, cell):
+        """
+        :param phase: Name of the phase just finished, one of ``phases``
+        :param cell: The cell that finished it
+
+        Adds the time since the last lap to the phase and to the cell.
+        """
+        now = perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self._seconds[phase] += elapsed
+        self._cell_seconds[self._cell] = self._cell_seconds.get(self._cell, 0.0) + elapsed
+        self._animals[phase] += len(cell.animals)
+
+    def end_year(self, cells, locate):
+        """
+        :param cells: Number of cells visited
+        :param locate: Function giving the ``(row, col)`` location of a grid index
+
+        Finishes the record of the year.
+        """
+        hot = heapq.nlargest(self.hot_cells, self._cell_seconds.items(), key=lambda c: c[1])
+        self.records.append({'year': self.year,
+                             'seconds': perf_counter() - self._start,
+                             'phases': self._seconds,
+                             'animals': self._animals,
+                             'cells': cells,
+                             'hot_cells': [{'loc': locate(index), 'seconds': seconds}
+                                           for index, seconds in hot]})
+
+    def totals(self):
+        """ :returns: Dict with the wall time of each phase, summed over all recorded years. """
+        return {phase: sum(record['phases'][phase] for record in self.records)
+                for phase in self.phases}
+
+    def write_json(self, path):
+        """ :param path: File to write all records to, as a JSON list. """
+        with open(path, 'w') as file:
+            json.dump(self.records, file, indent=1)
+
+
+class NullProfiler:
+    """ Stands in for ``PhaseProfiler`` when profiling is off. Records nothing. """
+
+    def start_year(self):
+        pass
+
+    def start_cell(self, index):
+        pass
+
+    def lap(self, phase, cell):
+        pass
+
+    def end_year(self, cells, locate):
+        pass
@@ -0,0 +1,26 @@
+import numpy as np
+
+# Used when animals are handled outside of a simulation, and no random numbers are passed in
+default_rng = np.random.default_rng()
+
+
+def seed_default_rng(seed):
+    """
+    :param seed: Seed for ``default_rng``, anything ``numpy.random.SeedSequence`` accepts
+
+    Reseeds ``default_rng`` in place, so modules that imported it draw the seeded numbers too.
+    """
+    default_rng.bit_generator.state = np.random.PCG64(np.random.SeedSequence(seed)).state
+
+
+def uniforms(rng, block=64):
+    """
+    :param rng: A ``numpy.random.Generator``
+    :param block: Number of values drawn per call to the generator
+
+    Yields uniform random numbers in :math:`[0, 1)`, drawn from ``rng`` in blocks.
+    Nothing is drawn before the first value is requested.
+    Used where the number of draws is not known in advance, like a predator's hunting attempts.
+    """
+    while True:
+        yield from rng.random(block).tolist()
@@ -0,0 +1,133 @@
+import zipfile
+import numpy as np
+from .histogram import Histograms
+
+
+class Recorder:
+    """
+    Writes the census of every year to a ``.npz`` file, one column per quantity.
+
+    For each year recorded, the file gets
+
+    - ``year``: The year.
+    - ``counts``: Number of animals of each species, indexed by ``[year, species]``.
+    - ``density``: Animals per cell, indexed by ``[year, species, row, col]``.
+    - ``hist_fitness``, ``hist_age``, ``hist_weight``: Histogram counts for each
+      property in ``hist_specs``, indexed by ``[year, species, bin]``.
+
+    Years are buffered in memory and appended to the file as one chunk every ``chunk_years``,
+    each quantity as its own array member of the zip archive. The file is only opened
+    to append a chunk, so the simulation does not wait on the disk in other years.
+    Use ``load_recording`` to read the columns back, joined over the chunks.
+    """
+
+    def __init__(self, path, species, shape, hist_specs=None, chunk_years=100):
+        """
+        :param path: The ``.npz`` file to write. An existing file is replaced.
+        :param species: Names of the species to record
+        :param shape: ``(rows, cols)`` of the island map
+        :param hist_specs: Bins of the histograms to record, as for ``BioGraphics``,
+                           e.g. ``{'age': {'max': 60, 'delta': 2}}``. No histograms if None.
+                           See ``Histograms``.
+        :param chunk_years: Number of years buffered before they are written
+        """
+        if chunk_years < 1:
+            raise ValueError('chunk_years must be positive')
+
+        self.path = path
+        self.species = list(species)
+        self.shape = tuple(shape)
+        self.chunk_years = chunk_years
+        self.histograms = Histograms(species, hist_specs if hist_specs is not None else {})
+        self.chunks = 0
+        self.closed = False
+
+        self._buffer = self._allocate()
+        self._buffered = 0
+
+        with zipfile.ZipFile(path, 'w') as archive:
+            self._write(archive, 'species', np.array(self.species))
+            for prop in self.histograms.properties:
+                self._write(archive, f'bins_{prop}', self.histograms.edges(prop))
+
+    def _allocate(self):
+        """ :returns: Dict with a buffer of ``chunk_years`` rows for every column. """
+        species, (rows, cols) = len(self.species), self.shape
+        buffer = {'year': np.zeros(self.chunk_years, dtype=np.int64),
+                  'counts': np.zeros((self.chunk_years, species), dtype=np.int64),
+                  'density': np.zeros((self.chunk_years, species, rows, cols), dtype=np.int32)}
+        for prop in self.histograms.properties:
+            bins = len(self.histograms.edges(prop)) - 1
+            buffer[f'hist_{prop}'] = np.zeros((self.chunk_years, species, bins), dtype=np.int64)
+        return buffer
+
+    def record(self, snapshot, histograms=None):
+        """
+        :param snapshot: ``Snapshot`` of the year to record
+        :param histograms: The ``histograms`` of the recorder, filled for the year
+                           by ``Island.histograms``. If None, they are counted
+                           from the attribute arrays of the snapshot.
+        """
+        if self.closed:
+            raise RuntimeError('The recording is closed')
+        if histograms is None and self.histograms:
+            histograms = self.histograms.count(snapshot)
+        row = self._buffered
+        self._buffer['year'][row] = snapshot.year
+        for column, species in enumerate(self.species):
+            self._buffer['counts'][row, column] = snapshot.counts[species]
+            self._buffer['density'][row, column] = snapshot.density[species]
+        for prop in self.histograms.properties:
+            self._buffer[f'hist_{prop}'][row] = histograms.counts(prop)
+        self._buffered += 1
+        if self._buffered == self.chunk_years:
+            self.flush()
+
+    def flush(self):
+        """ Appends the buffered years to the file. """
+        if self._buffered == 0:
+            return
+        with zipfile.ZipFile(self.path, 'a') as archive:
+            for name, column in self._buffer.items():
+                self._write(archive, f'{name}.{self.chunks:05d}', column[:self._buffered])
+        self.chunks += 1
+        self._buffered = 0
+
+    def close(self):
+        """ Writes the remaining years. Nothing more can be recorded. """
+        if not self.closed:
+            self.flush()
+            self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _write(archive, name, array):
+        with archive.open(f'{name}.npy', 'w', force_zip64=True) as member:
+            np.lib.format.write_array(member, np.ascontiguousarray(array),
+                                      allow_pickle=False)
+
+
+def load_recording(path):
+    """
+    :param path: File written by a ``Recorder``
+    :returns: Dict with ``species``, the ``bins_<property>`` edges of each histogram,
+              and each column of the recording with the chunks joined along the years.
+    """
+    recording = {}
+    chunks = {}
+    with np.load(path) as archive:
+        for name in archive.files:
+            column, _, chunk = name.partition('.')
+            if chunk:
+                chunks.setdefault(column, []).append((int(chunk), archive[name]))
+            else:
+                recording[name] = archive[name]
+    for column, parts in chunks.items():
+        recording[column] = np.concatenate([part for _, part in sorted(parts, key=lambda p: p[0])])
+    recording['species'] = recording['species'].tolist()
+    return recording
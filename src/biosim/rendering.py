@@ -0,0 +1,214 @@
+import collections
+import copy
+import multiprocessing
+import multiprocessing.sharedctypes
+import weakref
+import numpy as np
+from .histogram import Histograms, DEFAULT_SPECS
+
+# The BioGraphics drawing the frames, one in every worker process
+_graphics = None
+# The count history shared with the renderer, indexed by [species, year]
+_history = None
+_species = None
+
+
+def _count_history(buffer, species):
+    """ :returns: Array view of a shared count history, indexed by ``[species, year]``. """
+    return np.frombuffer(buffer, dtype=np.int64).reshape(len(species), -1)
+
+
+def _start_worker(island_map, hist_specs, img_dir, img_base, img_fmt, history, species):
+    """ Makes the figure of a worker process, drawn without a display. """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    from .biographics import BioGraphics
+    global _graphics, _history, _species
+    _graphics = BioGraphics(island_map, 1, None, None, hist_specs, img_dir, img_base, img_fmt)
+    _history = _count_history(history, species)
+    _species = species
+
+
+def _draw_frame(frame):
+    """ Draws the frame and saves its image. Runs in a worker process. """
+    shown = slice(frame.first_year, frame.year + 1)
+    frame.counts = {s: _history[i, shown] for i, s in enumerate(_species)}
+    _graphics.draw_frame(frame)
+
+
+def _stop(pool):
+    pool.terminate()
+
+
+class Frame:
+    """
+    Everything needed to draw one saved year, without the animals themselves.
+
+    - ``number``: Number of the image file.
+    - ``year`` and ``num_years``: The year drawn, and the last year of the count graph.
+    - ``first_year`` and ``counts``: Array with the number of animals of each species
+      for every year from ``first_year`` up to ``year``. Frames are handed to the workers
+      without ``counts``, which are filled in from the count history shared with them.
+    - ``density``: Array with the number of animals per cell, for each species.
+    - ``histograms``: ``Histograms`` of fitness, age and weight.
+    - ``cmax``: Upper limit of the color scale of each heatmap.
+    - ``ymax``: Upper limit of the count graph, ``'counts'``, and of each histogram.
+    """
+
+    def __init__(self, number, year, num_years, first_year, counts, density, histograms,
+                 cmax, ymax):
+        self.number = number
+        self.year = year
+        self.num_years = num_years
+        self.first_year = first_year
+        self.counts = counts
+        self.density = density
+        self.histograms = histograms
+        self.cmax = cmax
+        self.ymax = ymax
+
+
+class FrameRenderer:
+    """
+    Saves the figures of ``BioGraphics`` as image files, drawn by a pool of worker processes.
+
+    Each saved year, the renderer makes a ``Frame`` of densities and histograms,
+    and hands it to the pool. The counts of every year are written to a buffer shared with
+    the workers, allocated by ``setup`` for all years to simulate, so a frame does not grow
+    with the number of years. At most ``max_pending`` frames wait to be drawn;
+    when the queue is full, the next frame waits for the oldest one to finish, so memory
+    stays bounded. The simulation only waits on matplotlib then.
+
+    The axis limits and color scales grow with the largest values seen, as in ``BioGraphics``,
+    and are decided here, so all workers draw the frames with the same scales.
+    """
+
+    def __init__(self, island_map, species, img_dir, img_base, img_fmt='png', img_years=None,
+                 ymax_animals=None, cmax_animals=None, hist_specs=None, processes=2,
+                 max_pending=None):
+        """
+        :param island_map: Multi-line string specifying island geography
+        :param species: Names of the species drawn
+        :param processes: Number of worker processes drawing frames
+        :param max_pending: Number of frames that may wait to be drawn (default: 2 per process)
+
+        For the rest of parameters, see ``BioGraphics``.
+        """
+        if img_dir is None:
+            raise ValueError('Frames are only rendered to image files, img_dir is needed')
+        hist_specs = {**DEFAULT_SPECS, **(hist_specs if hist_specs is not None else {})}
+        self.species = list(species)
+        self.img_dir, self.img_base, self.img_fmt = img_dir, img_base, img_fmt
+        self.img_years = img_years if img_years is not None else 1
+        self.ymax_animals = ymax_animals
+        self.cmax_animals = cmax_animals if cmax_animals is not None else {}
+        self.histograms = Histograms(self.species, hist_specs)
+        self.max_pending = max_pending if max_pending is not None else 2 * processes
+        self.processes = processes
+        self.num_years = 0
+
+        self._worker_args = (island_map, hist_specs, img_dir, img_base, img_fmt)
+        self._number = 0
+        self._first_year = None
+        self._last_year = -1
+        self._cmax = {}
+        self._ymax = {'counts': ymax_animals if ymax_animals is not None else 1}
+        self._ymax.update({prop: 1 for prop in self.histograms.properties})
+        self._pending = collections.deque()
+        self._history = None
+        self._pool = None
+        self._stopper = None
+
+    def setup(self, num_years):
+        """
+        :param num_years: The last year of the count graph
+
+        Starts the workers, or restarts them with a larger count history
+        when there is no room for the years up to ``num_years``.
+        """
+        self.num_years = num_years
+        capacity = 0 if self._history is None else self._history.shape[1]
+        if num_years >= capacity:
+            self._start_pool(max(num_years + 1, 2 * capacity))
+        elif self._pool is None:
+            self._start_pool(capacity)
+
+    def _start_pool(self, years):
+        """ Starts the workers, sharing a count history with room for ``years`` years. """
+        self.close()
+        buffer = multiprocessing.sharedctypes.RawArray('q', len(self.species) * years)
+        history = _count_history(buffer, self.species)
+        if self._history is not None:
+            history[:, :self._history.shape[1]] = self._history
+        self._history = history
+        self._pool = multiprocessing.Pool(self.processes, _start_worker,
+                                          self._worker_args + (buffer, self.species))
+        self._stopper = weakref.finalize(self, _stop, self._pool)
+
+    @property
+    def counts(self):
+        """ Dict with the number of animals of each species, for every year rendered so far. """
+        shown = slice(self._first_year, self._last_year + 1)
+        return {s: self._history[i, shown].copy() for i, s in enumerate(self.species)}
+
+    def update(self, snapshot, histograms):
+        """
+        :param snapshot: ``Snapshot`` of the year. Only its counts and densities are used.
+        :param histograms: The ``histograms`` of the renderer, filled for the year
+
+        Records the counts of the year, and hands a frame to the pool if it is a saved year.
+        """
+        if self._pool is None:
+            raise RuntimeError('The renderer is not set up, or closed')
+        if self._first_year is None:
+            self._first_year = snapshot.year
+        self._last_year = snapshot.year
+        for i, s in enumerate(self.species):
+            self._history[i, snapshot.year] = snapshot.counts[s]
+            # Scales grow with headroom, like in BioGraphics
+            if self.ymax_animals is None and snapshot.counts[s] > self._ymax['counts']:
+                self._ymax['counts'] = 1.2 * snapshot.counts[s]
+            cmax = self.cmax_animals.get(s, max(1, snapshot.density[s].max()))
+            self._cmax[s] = max(self._cmax.get(s, 0), cmax)
+        for prop in histograms.properties:
+            largest = histograms.counts(prop).max()
+            if largest > self._ymax[prop]:
+                self._ymax[prop] = 1.2 * largest
+
+        if snapshot.year % self.img_years == 0:
+            self._submit(Frame(self._number, snapshot.year, self.num_years, self._first_year,
+                               None, snapshot.density, copy.deepcopy(histograms), dict(self._cmax),
+                               dict(self._ymax)))
+            self._number += 1
+
+    def _submit(self, frame):
+        """
+        Queues the frame, after waiting for the oldest frames if the queue is full.
+        The frame is pickled later, so it must not share arrays that change.
+        """
+        while len(self._pending) >= self.max_pending:
+            self._pending.popleft().get()
+        self._pending.append(self._pool.apply_async(_draw_frame, (frame,)))
+
+    def wait(self):
+        """ Waits until all frames are saved. Raises errors of the workers. """
+        while self._pending:
+            self._pending.popleft().get()
+
+    def close(self):
+        """
+        Waits until all frames are saved, and stops the worker processes.
+        A following ``setup`` starts them again.
+        """
+        if self._pool is not None:
+            self.wait()
+            self._stopper.detach()
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def make_movie(self, movie_fmt=None):
+        """ Closes the renderer, and makes a movie of the saved images, see ``Graphics``. """
+        self.close()
+        from .graphics import Graphics
+        Graphics(self.img_dir, self.img_base, self.img_fmt).make_movie(movie_fmt)
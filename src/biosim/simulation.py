@@ -4,32 +4,94 @@ Template for BioSim class.
 
 from .parameters import default_animal_parameters_copy, default_land_parameters_copy, \
     assert_valid_animal_parameter, assert_valid_land_parameter
-import random
 import logging
+import os
+import pickle
 import sys
+import numpy as np
 from .island import Island
-from .biographics import BioGraphics
+from .parallel import ParallelIsland
+from .landscape import Landscape
+from .population import PopulationLandscape
+from .profiling import PhaseProfiler
+from .recorder import Recorder
+from .history import DensityHistory
+from .rendering import FrameRenderer
 
 # The material in this file is licensed under the BSD 3-clause license
 # https://opensource.org/licenses/BSD-3-Clause
 # (C) Copyright 2021 Hans Ekkehard Plesser / NMBU
 
 
+# Landscape cell classes for each population backend
+_backends = {'objects': Landscape, 'arrays': PopulationLandscape}
+
+# Version of the checkpoint file contents, see ``BioSim.save_checkpoint``
+_CHECKPOINT_FORMAT = 1
+
+
 class BioSim:
     def __init__(self, island_map, ini_pop, seed,
                  vis_years=1, ymax_animals=None, cmax_animals=None, hist_specs=None,
                  img_dir=None, img_base=None, img_fmt='png', img_years=None,
-                 log_file=None):
+                 log_file=None, backend='objects', workers=None,
+                 checkpoint_file=None, checkpoint_years=None, movie_fmt=None,
+                 render_processes=None):
         """
         :param island_map: Multi-line string specifying island geography
         :param ini_pop: List of dictionaries specifying initial population, see ``add_population``.
-        :param seed: used as random number seed
+        :param seed: Seed for the ``numpy.random.Generator`` owned by the simulation.
+                     All random events on the island are drawn from it, so a given seed
+                     always gives the same simulation, regardless of other use of ``random``.
         :type seed: int
         :param log_file: If given, write animal counts to this file
+        :param backend: How animals are stored. ``'objects'`` keeps one ``Animal`` per animal,
+                        ``'arrays'`` keeps the animals of each cell in NumPy arrays,
+                        see :ref:`population`.
+        :param workers: If given, the island is split into bands of rows simulated by this many
+                        worker processes, see :ref:`parallel`. Every cell then has its own
+                        random stream, so the result is the same for any number of workers,
+                        but differs from the result without workers.
+        :param checkpoint_file: If given, ``simulate`` writes a checkpoint to this file,
+                                see ``save_checkpoint``.
+        :param checkpoint_years: Years between checkpoints (default: 1)
+        :param movie_fmt: If ``'mp4'``, the figures of the years saved are piped straight into
+                          ffmpeg as raw frames, and ``make_movie`` finishes the movie.
+                          No image files are written.
+        :param render_processes: If given, the images for ``img_dir`` are drawn by this many
+                                 worker processes, from frames handed over each saved year,
+                                 see :ref:`rendering`. The graphics of this process then only
+                                 show the figure, with ``vis_years``.
 
         For the rest of parameters, see :ref:`biographics`.
+        With ``vis_years=0`` the simulation runs headless: no graphics are made,
+        and matplotlib is never imported.
         """
+        if backend not in _backends:
+            raise ValueError(f'Unknown backend {backend}')
         self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.island_map = island_map
+
+        self.years_simulated = 0
+        self.land_parameters = default_land_parameters_copy()
+        self.animal_parameters = default_animal_parameters_copy()
+
+        if workers is None:
+            self.island = Island(island_map, self.land_parameters, _backends[backend], self.rng)
+        else:
+            self.island = ParallelIsland(island_map, self.land_parameters, _backends[backend],
+                                         self.rng, workers)
+        self.add_population(ini_pop)
+
+        self._setup_output(vis_years, ymax_animals, cmax_animals, hist_specs,
+                           img_dir, img_base, img_fmt, img_years, log_file,
+                           checkpoint_file, checkpoint_years, movie_fmt, render_processes)
+
+    def _setup_output(self, vis_years, ymax_animals, cmax_animals, hist_specs,
+                      img_dir, img_base, img_fmt, img_years, log_file,
+                      checkpoint_file, checkpoint_years, movie_fmt, render_processes):
+        """ Sets up logging, graphics and checkpoints. These are not part of a checkpoint. """
         self.logger = logging.getLogger()
         self.logger.setLevel(logging.INFO)
         if log_file is not None:
@@ -37,15 +99,82 @@ class BioSim:
         else:
             self.logger.addHandler(logging.StreamHandler(sys.stdout))
 
-        self.years_simulated = 0
-        self.land_parameters = default_land_parameters_copy()
-        self.animal_parameters = default_animal_parameters_copy()
+        self.renderer = None
+        if render_processes is not None:
+            if movie_fmt is not None:
+                raise ValueError("Streamed movies can not be drawn by render processes")
+            self.renderer = FrameRenderer(self.island_map, list(self.animal_parameters),
+                                          img_dir, img_base, img_fmt,
+                                          img_years if img_years is not None else vis_years or 1,
+                                          ymax_animals, cmax_animals, hist_specs,
+                                          render_processes)
+            # Images are saved by the renderer only
+            img_dir = None
 
-        self.island = Island(island_map, self.land_parameters)
-        self.add_population(ini_pop)
+        self.graphing = None
+        if vis_years != 0:
+            # Imported here, so headless simulations do not pay for importing matplotlib
+            from .biographics import BioGraphics
+            self.graphing = BioGraphics(self.island_map, vis_years, ymax_animals, cmax_animals,
+                                        hist_specs, img_dir, img_base, img_fmt, img_years,
+                                        movie_fmt)
+
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_years = checkpoint_years if checkpoint_years is not None else 1
+        self.recorder = None
+        self.history = None
+
+    def save_checkpoint(self, path):
+        """
+        :param path: File to write the checkpoint to. An existing file is replaced.
+
+        Writes the full state of the simulation, the island with all animals, the parameters,
+        the year and the state of the random generator, as one pickle.
+        A simulation restored with ``from_checkpoint`` continues exactly as this one would.
+        The file is written to a temporary name first, so a crash never leaves a broken checkpoint.
+        """
+        state = {'format': _CHECKPOINT_FORMAT,
+                 'seed': self.seed,
+                 'rng': self.rng,
+                 'island_map': self.island_map,
+                 'years_simulated': self.years_simulated,
+                 'land_parameters': self.land_parameters,
+                 'animal_parameters': self.animal_parameters,
+                 'island': self.island}
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @classmethod
+    def from_checkpoint(cls, path, vis_years=1, ymax_animals=None, cmax_animals=None,
+                        hist_specs=None, img_dir=None, img_base=None, img_fmt='png',
+                        img_years=None, log_file=None, checkpoint_file=None,
+                        checkpoint_years=None, movie_fmt=None, render_processes=None):
+        """
+        :param path: Checkpoint file written by ``save_checkpoint``
+        :returns: A ``BioSim`` with the state of the checkpoint
+
+        Visualization, logging and checkpoints are not stored, and are set up
+        from the other parameters, like in the constructor.
+        """
+        with open(path, 'rb') as file:
+            state = pickle.load(file)
+        if state.get('format') != _CHECKPOINT_FORMAT:
+            raise ValueError(f'{path} is not a supported checkpoint')
 
-        self.graphing = BioGraphics(island_map, vis_years, ymax_animals, cmax_animals, hist_specs,
-                                    img_dir, img_base, img_fmt, img_years)
+        sim = cls.__new__(cls)
+        sim.seed = state['seed']
+        sim.rng = state['rng']
+        sim.island_map = state['island_map']
+        sim.years_simulated = state['years_simulated']
+        sim.land_parameters = state['land_parameters']
+        sim.animal_parameters = state['animal_parameters']
+        sim.island = state['island']
+        sim._setup_output(vis_years, ymax_animals, cmax_animals, hist_specs,
+                          img_dir, img_base, img_fmt, img_years, log_file,
+                          checkpoint_file, checkpoint_years, movie_fmt, render_processes)
+        return sim
 
     def set_animal_parameters(self, species, params):
         """
@@ -80,17 +209,42 @@ class BioSim:
         Run simulation while visualizing the result.
 
         :param num_years: number of years to simulate
-        """
-        random.seed(self.seed)
 
-        self.graphing.setup(self.year + num_years)
+        The random number stream continues from the previous call, so simulating in several
+        calls gives the same result as simulating all years in one call.
+        Raises ``ValueError`` before any year runs, if a density history has no room for them.
+        With ``render_processes``, returns when the workers have saved all images.
+        """
+        if self.history is not None and self.history.room < num_years:
+            raise ValueError(f'The density history has room for {self.history.room} more years,'
+                             f' not {num_years}')
+        if self.graphing is not None:
+            self.graphing.setup(self.year + num_years)
+        if self.renderer is not None:
+            self.renderer.setup(self.year + num_years)
 
         for year in range(num_years):
             self.island.simulate_year()
             self.years_simulated += 1
-            self.graphing.update(self)
+            snapshot = None
+            if self.graphing is not None:
+                snapshot = self.snapshot()
+                self.graphing.update(snapshot)
+            if self.renderer is not None:
+                self.renderer.update(snapshot or self.snapshot(attributes=False),
+                                     self.island.histograms(self.renderer.histograms))
+            if self.recorder is not None:
+                self._record(snapshot)
+            if self.history is not None:
+                self.island.density(self.history.species, out=self.history.slot(self.year))
 
             self.logger.info(f"years: {self.year}, counts: {self.num_animals_per_species}")
+            if self.checkpoint_file is not None and self.year % self.checkpoint_years == 0:
+                self.save_checkpoint(self.checkpoint_file)
+
+        if self.renderer is not None:
+            # The images of all years simulated are saved when simulate returns
+            self.renderer.wait()
 
     def add_population(self, population):
         """
@@ -100,6 +254,77 @@ class BioSim:
         """
         self.island.add_populations(population, self.animal_parameters)
 
+    def enable_profiling(self, hot_cells=5):
+        """
+        :param hot_cells: Number of the slowest cells to report for each year
+        :returns: The ``PhaseProfiler`` recording every following year, see :ref:`profiling`.
+        """
+        self.island.profiler = PhaseProfiler(hot_cells, self.year)
+        return self.island.profiler
+
+    def start_recording(self, path, hist_specs=None, chunk_years=100):
+        """
+        :param path: The ``.npz`` file to record to
+        :param hist_specs: Histograms to record, as for the graphics. None records no histograms.
+        :param chunk_years: Number of years buffered before they are written
+        :returns: The ``Recorder``, see :ref:`recorder`.
+
+        Records the current year, and every year simulated until ``stop_recording``.
+        """
+        self.stop_recording()
+        self.recorder = Recorder(path, list(self.animal_parameters), self.island.shape,
+                                 hist_specs, chunk_years)
+        self._record(None)
+        return self.recorder
+
+    def _record(self, snapshot):
+        """
+        :param snapshot: ``Snapshot`` made for the graphics this year, or None
+
+        Records the year. Without a snapshot, the histograms are counted straight from the cells.
+        """
+        if snapshot is not None:
+            self.recorder.record(snapshot)
+        else:
+            self.recorder.record(self.snapshot(attributes=False),
+                                 self.island.histograms(self.recorder.histograms))
+
+    def stop_recording(self):
+        """ Writes the years still buffered by the recorder, and stops recording. """
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def start_density_history(self, path, num_years):
+        """
+        :param path: The ``.npy`` file to keep the history in
+        :param num_years: Number of years to make room for, after the current year
+        :returns: The ``DensityHistory``, see :ref:`history`.
+
+        Writes the number of animals per cell of the current year, and of every year simulated
+        until ``stop_density_history``, straight into a memory-mapped file.
+        """
+        self.stop_density_history()
+        self.history = DensityHistory(path, list(self.animal_parameters), self.island.shape,
+                                      num_years + 1, self.year)
+        self.island.density(self.history.species, out=self.history.slot(self.year))
+        return self.history
+
+    def stop_density_history(self):
+        """ Writes the density history to disk, and stops it. """
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+
+    def snapshot(self, attributes=True):
+        """
+        :param attributes: If False, the fitness, age and weight arrays are left empty
+        :returns: A ``Snapshot`` of the island after the last year simulated,
+                  with counts, densities per cell and NumPy arrays of fitness, age and weight
+                  for each species. Gathered in one pass over the island, see :ref:`island`.
+        """
+        return self.island.snapshot(list(self.animal_parameters), self.year, attributes)
+
     @property
     def year(self):
         """ Last year simulated. """
@@ -108,7 +333,7 @@ class BioSim:
     @property
     def num_animals(self):
         """ Total number of animals on island. """
-        return sum(self.island.species_count(s) for s in self.animal_parameters.keys())
+        return sum(self.island.species_counts().values())
 
     @property
     def num_animals_per_species(self):
@@ -145,5 +370,10 @@ class BioSim:
         return {s: self.island.species_weights(s) for s in self.animal_parameters.keys()}
 
     def make_movie(self):
-        """ Create MPEG4 movie from visualization images saved. """
+        """ Create MPEG4 movie from visualization images saved, or finish the streamed movie. """
+        if self.renderer is not None:
+            self.renderer.make_movie()
+            return
+        if self.graphing is None:
+            raise RuntimeError("Can't make movie without image files")
         self.graphing.make_movie()
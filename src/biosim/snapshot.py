@@ -0,0 +1,41 @@
+import numpy as np
+
+
+class Snapshot:
+    """
+    The state of the animals on the island at the end of a year, gathered by
+    ``Island.snapshot`` in one pass over the cells.
+
+    All attributes are dicts with one entry per species:
+
+    - ``counts``: Number of animals on the island.
+    - ``density``: NumPy array shaped like the island map, with the number of animals per cell.
+    - ``fitness``, ``age`` and ``weight``: NumPy arrays with the values for every animal.
+
+    The snapshot is a copy, and does not change when the simulation continues.
+    """
+
+    def __init__(self, year, counts, density, fitness, age, weight):
+        """
+        :param year: The last year simulated when the snapshot was taken
+        """
+        self.year = year
+        self.counts = counts
+        self.density = density
+        self.fitness = fitness
+        self.age = age
+        self.weight = weight
+
+    @property
+    def num_animals(self):
+        """ Total number of animals on the island. """
+        return sum(self.counts.values())
+
+    def cell_counts(self, species):
+        """
+        :param species: Name of one species
+        :returns: Dict with the number of animals of the species per ``(row, col)`` location,
+                  like ``Island.cell_population``.
+        """
+        return {(row + 1, col + 1): int(count)
+                for (row, col), count in np.ndenumerate(self.density[species])}
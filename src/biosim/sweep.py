@@ -0,0 +1,182 @@
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import numpy as np
+from .parameters import default_animal_parameters_copy, default_land_parameters_copy, \
+    assert_valid_animal_parameter, assert_valid_land_parameter, compile_animal_parameters
+from .ensemble import EnsembleResult, _count_years
+from .island import Island
+from .simulation import _backends
+
+# The pickled template island of the sweep, set once in every worker process
+_template = None
+
+
+def _set_template(template):
+    global _template
+    _template = template
+
+
+def _run_point(task):
+    """
+    Forks the template island, applies the parameter point, and simulates it.
+    Runs in a worker process.
+
+    :returns: The task, and the array of yearly species counts.
+    """
+    point, seed, num_years = task
+    island, animal_parameters = pickle.loads(_template)
+    for (target, param), value in point.items():
+        parameters = animal_parameters if target in animal_parameters else island.land_parameters
+        parameters[target][param] = value
+    # All cells share the generator of the island, so this reseeds every cell
+    island.rng.bit_generator.state = np.random.default_rng(seed).bit_generator.state
+    return task, _count_years(island, list(animal_parameters), num_years)
+
+
+def _describe(value):
+    """ Makes parameter values, like species constructors, usable in a cache key. """
+    if isinstance(value, type):
+        return f'{value.__module__}.{value.__qualname__}'
+    raise TypeError(f'Can not make a cache key of {value!r}')
+
+
+class Sweep:
+    """
+    Runs a simulation for a grid of parameter points and seeds.
+
+    The island is made and populated once for every call of ``run``, as a template,
+    and pickled. Every run forks the template by unpickling it, sets the parameters of its point
+    and reseeds the generator, so a run gives the same counts as ``BioSim`` with
+    that seed and those parameters. Changes to ``animal_parameters`` and ``land_parameters``
+    apply to the following calls of ``run``.
+
+    With a cache directory, the counts of each run are kept in a ``.npz`` file, keyed by map,
+    initial population, backend, parameters and seed. A run is reused by later sweeps
+    asking for the same or fewer years. Only the counts are cached, not the island,
+    so a run asked for more years than cached is simulated again from the start,
+    and its cache file is replaced by the longer run.
+    """
+
+    def __init__(self, island_map, ini_pop, backend='objects', cache_dir=None):
+        """
+        :param island_map: Multi-line string specifying island geography
+        :param ini_pop: List of dictionaries specifying initial population, see :ref:`island`.
+        :param backend: How animals are stored, see ``BioSim``.
+        :param cache_dir: Directory to cache the counts of every run in, no cache if None
+        """
+        if backend not in _backends:
+            raise ValueError(f'Unknown backend {backend}')
+        self.island_map = island_map
+        self.ini_pop = ini_pop
+        self.backend = backend
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.animal_parameters = default_animal_parameters_copy()
+        self.land_parameters = default_land_parameters_copy()
+
+    def _make_template(self):
+        """
+        :returns: The pickled island, populated with the current parameters,
+                  and the animal parameters its animals use.
+        """
+        animal_parameters = compile_animal_parameters(self.animal_parameters)
+        island = Island(self.island_map, self.land_parameters, _backends[self.backend])
+        island.add_populations(self.ini_pop, animal_parameters)
+        return pickle.dumps((island, animal_parameters))
+
+    @staticmethod
+    def grid(values):
+        """
+        :param values: Dict with a list of values for each ``(species or land type, parameter)``,
+                       e.g. ``{('Herbivore', 'zeta'): [2, 3.5], ('L', 'f_max'): [500, 800]}``
+        :returns: List of parameter points, one for each combination of values
+        """
+        keys = list(values)
+        return [dict(zip(keys, combination))
+                for combination in itertools.product(*(values[key] for key in keys))]
+
+    def _check(self, point):
+        """ Raises ``ValueError`` for invalid parameters, like ``BioSim`` does. """
+        for (target, param), value in point.items():
+            if target in self.animal_parameters:
+                assert_valid_animal_parameter(target, param, value)
+            else:
+                assert_valid_land_parameter(target, param, value)
+
+    def _cache_file(self, point, seed):
+        """ :returns: The cache file of the run, or None without a cache. """
+        if self.cache_dir is None:
+            return None
+        animal_parameters = {species: dict(para) for species, para in
+                             self.animal_parameters.items()}
+        land_parameters = {land_type: dict(para) for land_type, para in
+                           self.land_parameters.items()}
+        for (target, param), value in point.items():
+            parameters = animal_parameters if target in animal_parameters else land_parameters
+            parameters[target][param] = value
+        key = json.dumps([self.island_map, self.ini_pop, self.backend, animal_parameters,
+                          land_parameters, seed], sort_keys=True, default=_describe)
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.npz')
+
+    def run(self, points, seeds, num_years, processes=None):
+        """
+        :param points: List of parameter points, as made by ``grid``
+        :param seeds: The seeds to simulate every point with
+        :param num_years: Number of years to simulate in every run
+        :param processes: Number of worker processes, default one per CPU.
+                          With 1, all runs are done in this process.
+        :returns: List with an ``EnsembleResult`` for each point, with one run per seed
+        """
+        seeds = list(seeds)
+        if len(set(seeds)) != len(seeds):
+            raise ValueError("Every run needs its own seed")
+        for point in points:
+            self._check(point)
+
+        results = [EnsembleResult(seeds, list(self.animal_parameters), num_years)
+                   for _ in points]
+        tasks = {}
+        for index, point in enumerate(points):
+            for seed in seeds:
+                cache_file = self._cache_file(point, seed)
+                if cache_file is not None and os.path.exists(cache_file):
+                    with np.load(cache_file) as cached:
+                        if len(cached['counts']) > num_years:
+                            results[index].add(seed, cached['counts'][:num_years + 1])
+                            continue
+                tasks.setdefault((tuple(point.items()), seed), []).append((index, cache_file))
+
+        if not tasks:
+            return results
+
+        # Made here, so the runs use the same parameters as the cache keys
+        template = self._make_template()
+        work = [(dict(point), seed, num_years) for point, seed in tasks]
+        if processes == 1:
+            _set_template(template)
+            self._collect(map(_run_point, work), tasks, results)
+        else:
+            with multiprocessing.Pool(processes, _set_template, (template,)) as pool:
+                self._collect(pool.imap_unordered(_run_point, work), tasks, results)
+        return results
+
+    def _collect(self, done, tasks, results):
+        """ Stores the counts of each finished run in the results, and in the cache. """
+        for (point, seed, _), counts in done:
+            for index, cache_file in tasks[(tuple(point.items()), seed)]:
+                results[index].add(seed, counts)
+                if cache_file is not None:
+                    self._store(cache_file, counts)
+
+    @staticmethod
+    def _store(cache_file, counts):
+        """ Writes the counts to the cache, through a temporary file. """
+        temporary = cache_file + '.tmp.npz'
+        np.savez(temporary, counts=counts)
+        os.replace(temporary, cache_file)
@@ -1,17 +1,15 @@
 from biosim.animals import Animal
-import random
+from biosim.fitness import fitness
+from biosim.prey import PreyIndex
+from biosim.randomness import default_rng, uniforms
+import numpy as np
 
 
 class Human(Animal):
     """ Class for a species of animal called carnivore """
 
-    def __init__(self, age, weight, parameters):
-        """
-        :param age: Age of carnivore as an integer
-        :param weight: Weight of carnivore as a float
-        :param parameters: Dict with valid parameter specification for carnivores
-        """
-        super().__init__('Human', age, weight, parameters)
+    __slots__ = ()
+    species = 'Human'
 
     @property
     def eating_priority(self):
@@ -21,11 +19,17 @@ class Human(Animal):
         """
         return -2
 
+    @classmethod
+    def eating_priorities(cls, fitness):
+        """ See ``Animal.eating_priorities``. """
+        return np.full(len(fitness), -2.)
+
     # 1. feeding
-    def feed(self, fodder, prey_list):
+    def feed(self, fodder, prey_list, rng=None):
         """
         :param fodder: plant food available
-        :param prey_list: list of preys for carnivores to eat
+        :param prey_list: ``PreyIndex`` or list of preys for humans to eat
+        :param rng: ``numpy.random.Generator`` for the hunting attempts
 
         See ``Animal.feed``.
 
@@ -43,42 +47,74 @@ class Human(Animal):
         :returns: the amount of fodder eaten
         """
         # First eat up to F_fodder plants, if possible
-        eaten_fodder = min(fodder, self.para['F_fodder'])
+        eaten_fodder = min(fodder, self.para.F_fodder)
         eaten = eaten_fodder
 
-        self.weight += self.para['beta_fodder'] * eaten_fodder
+        self.weight += self.para.beta_fodder * eaten_fodder
 
         # We possibly became full on fodder alone
-        if eaten >= self.para['F']:
+        if eaten >= self.para.F:
             return eaten_fodder
 
-        # We always attempt to eat the weakest first
-        prey_list.sort(key=lambda p: p.fitness)
+        if not isinstance(prey_list, PreyIndex):
+            prey_list = PreyIndex(prey_list)
+        draws = uniforms(default_rng if rng is None else rng)
         # Store our fitness locally, makes a significant speed difference
         own_fitness = self.fitness
-        for prey in prey_list[::-1]:
-            # No reason to continue once we reach dead prey
-            if prey.weight <= 0:
-                break
-
-            relative_fitness = (own_fitness - prey.fitness)/self.para['DeltaPhiMax']
-            if relative_fitness < 0:  # We have no shot at eating this prey
-                continue
-            if relative_fitness >= 1 or random.random() < relative_fitness:
+        # We attempt to eat the fittest first, but have no shot at prey fitter than ourselves
+        for prey in prey_list.fittest_first(own_fitness):
+            relative_fitness = (own_fitness - prey.fitness)/self.para.DeltaPhiMax
+            if relative_fitness >= 1 or next(draws) < relative_fitness:
                 # Can not eat more than F
-                eaten += (dinner := min(prey.weight, self.para['F']-eaten))
+                eaten += (dinner := min(prey.weight, self.para.F-eaten))
                 prey.weight = 0  # Prey gets consumed upon eating
-                self.weight += dinner * self.para['beta_prey']
+                self.weight += dinner * self.para.beta_prey
                 own_fitness = self.fitness
-                if eaten >= self.para['F']:
+                if eaten >= self.para.F:
                     break
 
         return eaten_fodder
 
-    def try_give_birth(self, species_count):
+    @classmethod
+    def feed_population(cls, para, population, members, fodder, rng):
+        """
+        See ``Animal.feed_population``.
+        Fodder is shared out in order like for herbivores,
+        then each human still hungry hunts like in ``feed``, fittest prey first.
+        """
+        eaten_fodder = np.clip(fodder - para.F_fodder * np.arange(len(members)),
+                               0, para.F_fodder)
+        population.weight[members] += para.beta_fodder * eaten_fodder
+        population.dirty[members[eaten_fodder > 0]] = True
+
+        prey = population.prey_table()
+        draws = uniforms(rng)
+        for i, eaten in zip(members.tolist(), eaten_fodder.tolist()):
+            if eaten >= para.F:
+                continue
+            age, weight = population.age.item(i), population.weight.item(i)
+            own_fitness = float(fitness(para, age, weight))
+            for j in prey.fittest_first(own_fitness):
+                relative_fitness = (own_fitness - prey.fitness[j])/para.DeltaPhiMax
+                if relative_fitness >= 1 or next(draws) < relative_fitness:
+                    eaten += (dinner := min(prey.weight[j], para.F-eaten))
+                    prey.alive[j] = False
+                    weight += dinner * para.beta_prey
+                    own_fitness = float(fitness(para, age, weight))
+                    if eaten >= para.F:
+                        break
+
+            population.weight[i] = weight
+            population.fitness[i] = own_fitness
+            population.dirty[i] = False
+        return eaten_fodder.sum()
+
+    def try_give_birth(self, species_count, draw=None, normal=None):
         """
         :param species_count: A dict containing, for each species, \
         the number of members in this cell
+        :param draw: Uniform random number in [0, 1), drawn here if not given
+        :param normal: Standard normal random number, drawn here if not given
 
         The human must be at least :math:`BirthAge_\\text{min}` to give birth.
         If satisfied, the formula from ``Animal`` is used to determine likelihood of birthing.
@@ -86,6 +122,11 @@ class Human(Animal):
 
         :returns: the newborn human if a birth occurred, otherwise None
         """
-        if self.age < self.para['BirthAge_min']:
+        if self.age < self.para.BirthAge_min:
             return
-        return super().try_give_birth(species_count)
+        return super().try_give_birth(species_count, draw, normal)
+
+    @classmethod
+    def fertile(cls, para, age, weight):
+        """ See ``Animal.fertile``, humans must also be at least :math:`BirthAge_\\text{min}`. """
+        return (age >= para.BirthAge_min) & super().fertile(para, age, weight)
@@ -1,3 +1,4 @@
+from biosim.parameters import compile_animal_parameters
 from .human import Human
 
 
@@ -23,3 +24,4 @@ default_human_parameters = {'Human': {
         'prey': False,
         'constructor': Human
     }}
+default_human_parameters = compile_animal_parameters(default_human_parameters)
@@ -0,0 +1,8 @@
+import pytest
+from biosim.randomness import seed_default_rng
+
+
+@pytest.fixture(autouse=True)
+def seeded_default_rng():
+    """ Animals handled outside of a simulation draw from a generator seeded for every test """
+    seed_default_rng(12345)
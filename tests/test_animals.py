@@ -2,11 +2,17 @@
 Tests for animals
 """
 import pytest
+import pickle
 import random
+import numpy as np
+from biosim.animals import Animal
 from biosim.herbivore import Herbivore
 from biosim.carnivore import Carnivore
 from biosim.parameters import default_animal_parameters_copy, default_land_parameters_copy
+from biosim.parameters import SpeciesParameters
 from biosim.landscape import Landscape
+from biosim.prey import PreyIndex
+from biosim.randomness import seed_default_rng
 
 
 class TestFunctionsAnimals:
@@ -34,6 +40,15 @@ class TestFunctionsAnimals:
         with pytest.raises(ValueError):
             self.parameters[animal_type]['constructor'](4, 0, self.parameters[animal_type])
 
+    @pytest.mark.parametrize('animal_type', ['Herbivore', 'Carnivore'])
+    def test_compact_animal(self, animal_type):
+        """ Animals have no __dict__, the species is a class attribute """
+        animal = self.animals[animal_type]
+        assert not hasattr(animal, '__dict__')
+        assert animal.species == type(animal).species == animal_type
+        with pytest.raises(AttributeError):
+            animal.colour = 'brown'
+
     # fitness
     @pytest.mark.parametrize('animal_type',
                              ['Herbivore', 'Carnivore'])
@@ -64,6 +79,22 @@ class TestFunctionsAnimals:
         animal.weight = 0
         assert animal.fitness == 0
 
+    def test_refresh_fitness(self):
+        """ Batched fitness of mixed species equals the fitness of each animal """
+        animals = [Herbivore(age, 10 + age, self.para_herb) for age in range(10)]
+        animals += [Carnivore(age, 5 + age, self.para_carn) for age in range(10)]
+        expected = [a.fitness for a in animals]
+        for a in animals:
+            a.age += 0  # Clears the cached fitness
+        Animal.refresh_fitness(animals)
+        assert all(a._calculated_fitness is not None for a in animals)
+        assert [a.fitness for a in animals] == pytest.approx(expected)
+
+    def test_refresh_fitness_keeps_cache(self):
+        self.herbivore._calculated_fitness = 0.5
+        Animal.refresh_fitness([self.herbivore])
+        assert self.herbivore.fitness == 0.5
+
     # feeding
     def test_herbivore_feeding(self):
         fodder = 30
@@ -135,6 +166,36 @@ class TestFunctionsAnimals:
             assert p.weight == 0 or p.weight > 12
         assert sum(p.weight == 0 for p in prey) == 3
 
+    def test_prey_index_order(self):
+        prey = [Herbivore(100, weight, self.para_herb) for weight in range(10, 40)]
+        random.shuffle(prey)
+        index = PreyIndex(prey)
+        weakest = list(index.weakest_first())
+        assert [p.fitness for p in weakest] == sorted(p.fitness for p in prey)
+        assert list(index.fittest_first()) == weakest[::-1]
+        assert list(index.fittest_first(weakest[5].fitness)) == weakest[5::-1]
+
+    def test_prey_index_skips_eaten(self):
+        prey = [Herbivore(100, weight, self.para_herb) for weight in range(10, 20)]
+        index = PreyIndex(prey)
+        weakest = list(index.weakest_first())
+        weakest[0].weight = 0
+        weakest[4].weight = 0
+        weakest[-1].weight = 0
+        assert list(index.weakest_first()) == weakest[1:4] + weakest[5:-1]
+        assert list(index.fittest_first()) == (weakest[1:4] + weakest[5:-1])[::-1]
+
+    def test_prey_index_shared_by_carnivores(self):
+        """ Several carnivores share one index, and never eat the same prey twice """
+        prey = [Herbivore(100, weight, self.para_herb) for weight in range(10, 40)]
+        self.para_carn['DeltaPhiMax'] = 0.01
+        self.para_carn['F'] = 21
+        index = PreyIndex(prey)
+        for _ in range(3):
+            Carnivore(5, 40, self.para_carn).feed(0, index)
+        # Each carnivore eats two prey, the weakest remaining
+        assert sorted(p.weight for p in prey)[:7] == [0] * 6 + [16]
+
     # procreation
     def test_procreation(self):
         ini_herb = [Herbivore(5, 40, self.para_herb) for _ in range(10)]
@@ -160,6 +221,13 @@ class TestFunctionsAnimals:
         assert child is not None
         assert parent_weight - child.weight * self.para_herb['xi'] == self.herbivore.weight
 
+    def test_birth_without_weight(self):
+        """ A drawn birth weight of zero or less aborts the birth """
+        self.para_herb['w_birth'] = 0
+        self.herbivore.weight = (parent_weight := 40)
+        assert self.herbivore.try_give_birth({'Herbivore': 1000}, draw=0, normal=-1) is None
+        assert self.herbivore.weight == parent_weight
+
     def test_low_motherweight(self):
         pop = 1000
         self.para_herb['w_birth'] = 40
@@ -228,3 +296,50 @@ class TestFunctionsAnimals:
         self.para_herb['omega'] = 0
         for _ in range(1000):
             assert not self.herbivore.death()
+
+
+def test_parameters_compiled():
+    """ The attributes and derived constants follow changes of the parameters """
+    para = default_animal_parameters_copy()['Herbivore']
+    assert isinstance(para, SpeciesParameters)
+    assert para.phi_age == para['phi_age']
+    para['zeta'] = 2
+    assert para.birth_weight_min == pytest.approx(2 * (para['w_birth'] + para['sigma_birth']))
+    para.update(w_birth=10)
+    assert para.birth_weight_min == pytest.approx(2 * (10 + para['sigma_birth']))
+
+
+def test_parameters_copy_and_pickle():
+    para = default_animal_parameters_copy()['Carnivore']
+    for other in para.copy(), pickle.loads(pickle.dumps(para)):
+        assert isinstance(other, SpeciesParameters)
+        assert other == para
+        assert other.birth_weight_min == para.birth_weight_min
+
+
+def test_plain_dict_parameters():
+    """ Animals only take compiled parameters """
+    para = dict(default_animal_parameters_copy()['Herbivore'])
+    with pytest.raises(TypeError):
+        Herbivore(5, 40, para)
+
+
+def test_compiled_once():
+    """ Plain dicts are compiled once where they enter, without changing the caller's dict """
+    parameters = {species: dict(para) for species, para in default_animal_parameters_copy().items()}
+    plain = parameters['Herbivore']
+    cell = Landscape('L', default_land_parameters_copy())
+    cell.add_population([{'species': 'Herbivore', 'age': 5, 'weight': 20}] * 3, parameters)
+    assert parameters['Herbivore'] is plain
+    para = cell.animals[0].para
+    assert isinstance(para, SpeciesParameters)
+    assert all(a.para is para for a in cell.animals)
+
+
+def test_default_rng_is_seedable():
+    """ Reseeding in place reaches modules that imported the generator """
+    from biosim.animals import default_rng
+    seed_default_rng(7)
+    first = default_rng.random(3)
+    seed_default_rng(7)
+    assert np.array_equal(default_rng.random(3), first)
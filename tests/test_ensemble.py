@@ -0,0 +1,53 @@
+from biosim.ensemble import Ensemble
+from biosim.simulation import BioSim
+import numpy as np
+import pytest
+
+GEOGR = "WWWWW\nWLHLW\nWLLDW\nWWWWW"
+INI_POP = [{'loc': (2, 2),
+            'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)]
+            + [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+
+@pytest.fixture
+def ensemble():
+    return Ensemble(GEOGR, INI_POP)
+
+
+def test_runs_match_biosim(ensemble):
+    result = ensemble.run([3, 1, 2], 8, processes=2)
+    assert result.counts.shape == (3, 9, 2)
+    sim = BioSim(GEOGR, INI_POP, seed=2, vis_years=0)
+    sim.simulate(8)
+    assert result.counts[2, -1].tolist() == [sim.num_animals_per_species['Herbivore'],
+                                             sim.num_animals_per_species['Carnivore']]
+    assert result.counts[:, 0, 0].tolist() == [30, 30, 30]
+
+
+def test_statistics(ensemble):
+    result = ensemble.run(range(4), 5, processes=1)
+    herbivores = result.species_counts('Herbivore')
+    assert result.mean('Herbivore') == pytest.approx(herbivores.mean(axis=0))
+    low, median, high = result.quantiles('Herbivore')
+    assert (low <= median).all() and (median <= high).all()
+
+
+def test_extinction(ensemble):
+    ensemble.set_animal_parameters('Carnivore', {'omega': 1.0, 'mu': 0})
+    ensemble.set_landscape_parameters('L', {'f_max': 0.0})
+    result = ensemble.run([1, 2], 30, processes=1)
+    years = result.extinction_years('Carnivore')
+    assert not np.isnan(years).any()
+    carnivores = result.species_counts('Carnivore')
+    assert (carnivores[[0, 1], years.astype(int)] == 0).all()
+    assert (carnivores[[0, 1], years.astype(int) - 1] > 0).all()
+    assert result.extinction_probability('Carnivore') == 1.0
+
+
+def test_invalid_setup(ensemble):
+    with pytest.raises(ValueError):
+        ensemble.set_animal_parameters('Herbivore', {'eta': 2})
+    with pytest.raises(ValueError):
+        ensemble.run([1, 1], 3)
+    with pytest.raises(ValueError):
+        Ensemble(GEOGR, INI_POP, backend='gpu')
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from biosim.histogram import Histogram, Histograms
+from biosim.island import Island
+from biosim.landscape import Landscape
+from biosim.parameters import default_animal_parameters_copy, default_land_parameters_copy
+from biosim.population import PopulationLandscape
+
+SPECS = {'fitness': {'max': 1.0, 'delta': 0.05}, 'age': {'max': 20, 'delta': 2},
+         'weight': {'max': 60, 'delta': 2.5}}
+
+
+@pytest.mark.parametrize('spec', SPECS.values())
+def test_same_counts_as_numpy(spec):
+    """ Also for values on the edges and outside the bins """
+    histogram = Histogram(spec['max'], spec['delta'])
+    rng = np.random.default_rng(3)
+    values = np.concatenate([rng.uniform(-0.1, 1.1, 1000) * spec['max'], histogram.edges])
+    histogram.add(values[:500])
+    histogram.add(values[500:].tolist())
+    assert histogram.counts.tolist() == np.histogram(values, histogram.edges)[0].tolist()
+
+
+def test_bins_with_rounding():
+    """ 0.3 / 0.1 is just below 3 in floating point """
+    histogram = Histogram(0.3, 0.1)
+    assert len(histogram.counts) == 3
+    assert histogram.edges == pytest.approx([0, 0.1, 0.2, 0.3])
+
+
+def test_reset():
+    histogram = Histogram(10, 1)
+    histogram.add([1, 2, 3])
+    histogram.reset()
+    assert histogram.counts.sum() == 0
+
+
+def test_unknown_property():
+    with pytest.raises(ValueError):
+        Histograms(['Herbivore'], {'height': {'max': 2, 'delta': 1}})
+
+
+@pytest.mark.parametrize('cell_type', [Landscape, PopulationLandscape])
+def test_island_counts_cells_like_snapshot(cell_type):
+    island = Island("WWWW\nWLHW\nWLDW\nWWWW", default_land_parameters_copy(), cell_type,
+                    np.random.default_rng(4))
+    island.add_populations([{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5,
+                                                     'weight': 20} for _ in range(50)]
+                             + [{'species': 'Carnivore', 'age': 5, 'weight': 20}
+                                for _ in range(10)]}], default_animal_parameters_copy())
+    for _ in range(4):
+        island.simulate_year()
+    species = ['Herbivore', 'Carnivore']
+    from_cells = island.histograms(Histograms(species, SPECS))
+    from_snapshot = Histograms(species, SPECS).count(island.snapshot(species))
+    for prop in SPECS:
+        assert from_cells.counts(prop).sum() > 0
+        assert (from_cells.counts(prop) == from_snapshot.counts(prop)).all()
+
+
+def test_merge():
+    histograms, other = Histograms(['Herbivore'], SPECS), Histograms(['Herbivore'], SPECS)
+    histograms.add('Herbivore', ([0.5], [3], [10]))
+    other.add('Herbivore', ([0.5, 0.7], [3], [30]))
+    histograms.merge(other)
+    assert histograms.counts('fitness').sum() == 3
+    assert histograms.counts('age')[0, 1] == 2
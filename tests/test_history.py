@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from biosim.history import DensityHistory, open_density_history
+from biosim.recorder import load_recording
+from biosim.simulation import BioSim
+
+
+@pytest.fixture
+def sim():
+    return BioSim(island_map="WWWWW\nWLHLW\nWLLDW\nWWWWW",
+                  ini_pop=[{'loc': (2, 2),
+                            'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                    for _ in range(40)]
+                            + [{'species': 'Carnivore', 'age': 5, 'weight': 20}
+                               for _ in range(10)]}],
+                  seed=12, vis_years=0)
+
+
+def test_history_matches_census(sim, tmp_path):
+    path = tmp_path / 'density.npy'
+    sim.simulate(2)
+    sim.start_density_history(path, 10)
+    cells = [sim.num_animals_per_cell_per_species]
+    for _ in range(6):
+        sim.simulate(1)
+        cells.append(sim.num_animals_per_cell_per_species)
+    sim.stop_density_history()
+
+    history = open_density_history(path)
+    assert isinstance(history['density'], np.memmap)
+    assert history['species'] == ['Herbivore', 'Carnivore']
+    assert history['years'].tolist() == list(range(2, 9))
+    assert history['density'].shape == (7, 2, 4, 5)
+    for year, counts in enumerate(cells):
+        for layer, species in enumerate(history['species']):
+            grid = history['density'][year, layer]
+            assert {(row + 1, col + 1): count for (row, col), count in np.ndenumerate(grid)} \
+                == counts[species]
+
+
+def test_history_is_written_in_place(sim, tmp_path):
+    history = DensityHistory(tmp_path / 'density.npy', ['Herbivore', 'Carnivore'], (4, 5), 2)
+    slot = history.slot(0)
+    assert sim.island.density(history.species, out=slot) is slot
+    assert history.data[0, 0, 1, 1] == 40
+
+
+def test_history_is_full(tmp_path):
+    history = DensityHistory(tmp_path / 'density.npy', ['Herbivore'], (2, 2), 1)
+    history.slot(0)
+    with pytest.raises(ValueError):
+        history.slot(1)
+
+
+def test_history_years_follow(tmp_path):
+    history = DensityHistory(tmp_path / 'density.npy', ['Herbivore'], (2, 2), 5, first_year=3)
+    with pytest.raises(ValueError):
+        history.slot(4)
+
+
+def test_history_with_recording(sim, tmp_path):
+    """ Starting a recording keeps the density history running, and both get every year """
+    sim.start_density_history(tmp_path / 'density.npy', 5)
+    sim.start_recording(tmp_path / 'census.npz')
+    sim.simulate(5)
+    assert sim.history is not None
+    sim.stop_recording()
+    sim.stop_density_history()
+
+    history = open_density_history(tmp_path / 'density.npy')
+    recording = load_recording(tmp_path / 'census.npz')
+    assert history['years'].tolist() == recording['year'].tolist()
+    assert np.array_equal(history['density'], recording['density'])
+    assert history['density'][-1].sum() == sim.num_animals
+
+
+def test_history_flushed_while_running(sim, tmp_path):
+    """ A run that stops early leaves the years flushed so far readable """
+    path = tmp_path / 'density.npy'
+    history = sim.start_density_history(path, 10)
+    history.flush_years = 2
+    sim.simulate(5)
+    assert open_density_history(path)['years'].tolist() == [0, 1, 2, 3]
+
+
+def test_history_without_room(sim, tmp_path):
+    sim.start_density_history(tmp_path / 'density.npy', 3)
+    with pytest.raises(ValueError):
+        sim.simulate(4)
+    assert sim.year == 0
+    sim.simulate(3)
+    assert sim.history.room == 0
@@ -19,6 +19,10 @@ class TestFunctionsHuman:
         self.para_herb = default_animal_parameters['Herbivore'].copy()
         self.herbivore = Herbivore(5, 40, self.para_herb)
 
+    def test_compact_human(self):
+        assert not hasattr(self.human, '__dict__')
+        assert self.human.species == 'Human'
+
     def test_no_fertile_children(self):
         n_humans = {'Human': 1000}  # Very likely for human to give birth
         human = Human(self.para_human['BirthAge_min']-1, 50, self.para_human)
@@ -1,5 +1,7 @@
 from biosim.parameters import default_land_parameters_copy, default_animal_parameters_copy
 from biosim.island import Island
+from biosim.landscape import Landscape
+import numpy as np
 import textwrap
 import pytest
 
@@ -48,6 +50,54 @@ class TestFunctionsIsland:
         with pytest.raises(ValueError):
             self.island.add_populations(population, self.animal_param)
 
+    def test_grid_layout(self):
+        assert self.island.shape == (3, 5)
+        assert self.island.land_codes.shape == (3, 5)
+        codes = self.island.land_codes[1, 1:4].tolist()
+        assert [self.island.land_types[code] for code in codes] == ['L', 'H', 'D']
+        assert self.island.cell((2, 3)).land_type == 'H'
+
+    def test_neighbour_table(self):
+        """ Corners have two neighbours, edges three and inner cells four """
+        counts = [len(neighbours) for neighbours in self.island._neighbours]
+        assert counts[0] == 2
+        assert counts[1] == 3
+        assert counts[6] == 4
+        assert self.island.cell((2, 2)) in self.island._neighbours[self.island._index((2, 3))]
+
+    def test_only_occupied_cells_active(self):
+        assert not self.island._active
+        self.island.add_populations(self.population, self.animal_param)
+        assert self.island._active == {self.island._index((2, 2))}
+        self.island.simulate_year()
+        occupied = {index for index, cell in enumerate(self.island._cells) if cell.animals}
+        assert self.island._active == occupied
+
+    def test_empty_cells_not_simulated(self, monkeypatch):
+        fed = []
+        monkeypatch.setattr(Landscape, 'animal_feeding', lambda cell: fed.append(cell))
+        self.island.add_populations(self.population, self.animal_param)
+        self.island.simulate_year()
+        assert fed == [self.island.cell((2, 2))]
+
+    def test_census_matches_cells(self):
+        self.island.add_populations(self.population, self.animal_param)
+        assert self.island.species_counts() == {'Herbivore': 50, 'Carnivore': 20}
+        for _ in range(5):
+            self.island.simulate_year()
+            for species in ('Herbivore', 'Carnivore'):
+                assert self.island.species_count(species) == sum(
+                    self.island.cell_population(species).values())
+
+    def test_snapshot(self):
+        self.island.add_populations(self.population, self.animal_param)
+        snapshot = self.island.snapshot(['Herbivore', 'Carnivore', 'Human'], year=0)
+        assert snapshot.counts == {'Herbivore': 50, 'Carnivore': 20, 'Human': 0}
+        assert snapshot.density['Herbivore'][1, 1] == 50
+        assert snapshot.density['Herbivore'].sum() == 50
+        assert snapshot.age['Carnivore'].tolist() == [5] * 20
+        assert len(snapshot.fitness['Human']) == 0
+
     def test_all_animals_without_food(self):
         geogr = "WWWW\nWDDW\nWWWW"
         island = Island(geogr, self.land_param)
@@ -56,3 +106,12 @@ class TestFunctionsIsland:
             island.simulate_year()
         assert island.species_count('Herbivore') == 0
         assert island.species_count('Carnivore') == 0
+
+
+def test_cell_streams_spawned_from_seed():
+    """ Cell streams follow the seed of the island, without ``Generator.spawn`` """
+    first, second = (Island("WWW\nWLW\nWWW", default_land_parameters_copy(),
+                            rng=np.random.default_rng(5), cell_streams=True) for _ in range(2))
+    draws = [cell.rng.random() for cell in first._cells]
+    assert len(set(draws)) == len(draws)
+    assert draws == [cell.rng.random() for cell in second._cells]
@@ -1,5 +1,6 @@
 from biosim.parameters import default_animal_parameters_copy, default_land_parameters_copy
 from biosim.landscape import Landscape
+import numpy as np
 import pytest
 
 
@@ -70,6 +71,17 @@ class TestFunctionsLandscape:
         gain_factor = self.para_land['H']['f_max'] * self.para_animal['Herbivore']['beta']
         assert new_weight == pytest.approx(pre_weight + gain_factor)
 
+    def test_fittest_herbivores_graze(self):
+        """ The fittest eat F each, one eats the rest, the others get nothing """
+        F = self.para_animal['Herbivore']['F']
+        self.para_land['H']['f_max'] = 2.5 * F
+        population = [{'species': 'Herbivore', 'age': 5, 'weight': w} for w in (10, 40, 20, 30)]
+        self.highland.add_population(population, self.para_animal)
+        self.highland.animal_feeding()
+        beta = self.para_animal['Herbivore']['beta']
+        gains = {w: a.weight - w for a, w in zip(self.highland.animals, (40, 30, 20, 10))}
+        assert gains == pytest.approx({40: beta * F, 30: beta * F, 20: beta * F / 2, 10: 0})
+
     def test_animal_breeding(self):
         """ With a high likelihood of breeding, check that the population increases """
         self.para_animal['Herbivore']['zeta'] = 1
@@ -103,6 +115,27 @@ class TestFunctionsLandscape:
         self.highland.animal_death()
         assert self.highland.get_count_of_species('Herbivore') == 1
 
+    def test_end_of_year_matches_phases(self):
+        """ The fused end of year gives the same animals as the three phases in turn """
+        population = [{'species': 'Herbivore', 'age': age, 'weight': 10 + age}
+                      for age in range(40)] + self.ini_carns
+        phases, fused = (Landscape('H', self.para_land, np.random.default_rng(3))
+                         for _ in range(2))
+        for cell in phases, fused:
+            cell.add_population(population, self.para_animal)
+        phases.animal_ageing()
+        phases.animal_weight_loss()
+        phases.animal_death()
+        animals = fused.animals
+        fused.animal_end_of_year()
+        assert fused.animals is animals
+        assert 0 < len(fused.animals) < len(population)
+        assert fused.species_counts() == phases.species_counts()
+        for species in 'Herbivore', 'Carnivore':
+            assert fused.species_ages(species) == phases.species_ages(species)
+            assert fused.species_weights(species) == phases.species_weights(species)
+            assert fused.species_fitness(species) == phases.species_fitness(species)
+
     def test_animal_migration(self):
         self.para_animal['Herbivore']['mu'] = 1
         self.highland.add_population(self.ini_herbs, self.para_animal)
@@ -115,3 +148,20 @@ class TestFunctionsLandscape:
         self.lowland.finish_animal_migration()
         assert len(self.lowland.incoming_animals) == 0
         assert len(self.highland.animals + self.lowland.animals) == self.n_herbs
+
+    def test_counters_follow_seasons(self):
+        """ The species counters match a recount after every season that changes the animals """
+        self.para_animal['Herbivore']['mu'] = 1
+        self.highland.add_population(self.ini_herbs + self.ini_carns, self.para_animal)
+
+        def recount(cell):
+            return {s: sum(a.species == s for a in cell.animals) for s in cell.species_counts()}
+
+        for season in (self.highland.animal_feeding, self.highland.animal_breeding,
+                       lambda: self.highland.animal_migration([self.lowland]),
+                       self.lowland.finish_animal_migration, self.highland.animal_death,
+                       self.highland.animal_end_of_year):
+            season()
+            for cell in (self.highland, self.lowland):
+                assert cell.species_counts() == recount(cell)
+        assert self.lowland.get_count_of_species('Herbivore') > 0
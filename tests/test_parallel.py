@@ -0,0 +1,98 @@
+from biosim.parameters import default_animal_parameters_copy, default_land_parameters_copy
+from biosim.island import Island
+from biosim.parallel import ParallelIsland, Tile
+from biosim.population import PopulationLandscape
+from biosim.landscape import Landscape
+import numpy as np
+import pytest
+
+GEOGR = "WWWWWW\nWLLHDW\nWLHHDW\nWLLLLW\nWHLDLW\nWWWWWW"
+
+
+def population():
+    return [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                    for _ in range(60)]
+             + [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(10)]}]
+
+
+def simulate(island, years=6):
+    animal_param = default_animal_parameters_copy()
+    island.add_populations(population(), animal_param)
+    for _ in range(years):
+        island.simulate_year()
+    return ({s: island.cell_population(s) for s in animal_param},
+            island.species_ages('Herbivore'), island.species_weights('Carnivore'))
+
+
+@pytest.mark.parametrize('cell_type', [Landscape, PopulationLandscape])
+def test_same_result_for_any_worker_count(cell_type):
+    results = []
+    for workers in [1, 2, 4]:
+        island = ParallelIsland(GEOGR, default_land_parameters_copy(), cell_type,
+                                np.random.default_rng(7), workers)
+        results.append(simulate(island))
+        island.close()
+    assert results[0] == results[1] == results[2]
+
+
+def test_same_result_as_cell_streams():
+    serial = Island(GEOGR, default_land_parameters_copy(), rng=np.random.default_rng(7),
+                    cell_streams=True)
+    parallel = ParallelIsland(GEOGR, default_land_parameters_copy(),
+                              rng=np.random.default_rng(7), workers=3)
+    assert simulate(serial) == simulate(parallel)
+    assert serial.species_counts() == parallel.species_counts()
+    snapshot = parallel.snapshot(['Herbivore', 'Carnivore'], year=6)
+    assert snapshot.density['Herbivore'].shape == serial.shape
+    assert snapshot.cell_counts('Herbivore') == serial.cell_population('Herbivore')
+    parallel.close()
+
+
+def test_add_population_after_start():
+    island = ParallelIsland(GEOGR, default_land_parameters_copy(), workers=2)
+    animal_param = default_animal_parameters_copy()
+    island.add_populations(population(), animal_param)
+    island.simulate_year()
+    assert island.started
+    before = island.species_count('Herbivore')
+    island.add_populations([{'loc': (5, 4), 'pop': [{'species': 'Herbivore', 'age': 1,
+                                                     'weight': 10}]}], animal_param)
+    assert island.species_count('Herbivore') == before + 1
+    with pytest.raises(ValueError):  # Raised in the worker
+        island.add_populations([{'loc': (1, 1), 'pop': population()[0]['pop']}], animal_param)
+    with pytest.raises(ValueError):
+        island.add_populations([{'loc': (9, 1), 'pop': []}], animal_param)
+    island.close()
+
+
+def test_needs_workers():
+    with pytest.raises(ValueError):
+        ParallelIsland(GEOGR, default_land_parameters_copy(), workers=0)
+
+
+def test_density_from_workers():
+    serial = Island(GEOGR, default_land_parameters_copy(), rng=np.random.default_rng(7),
+                    cell_streams=True)
+    parallel = ParallelIsland(GEOGR, default_land_parameters_copy(),
+                              rng=np.random.default_rng(7), workers=3)
+    simulate(serial, 3)
+    simulate(parallel, 3)
+    species = ['Carnivore', 'Herbivore']
+    out = np.full((2,) + serial.shape, -1, dtype=np.int32)
+    assert parallel.density(species, out=out) is out
+    assert (out == serial.density(species)).all()
+    parallel.close()
+
+
+def test_tile_density():
+    """ A tile has the state of an island, and counts its own rows into ``out`` """
+    island = Island(GEOGR, default_land_parameters_copy(), Landscape, np.random.default_rng(7),
+                    cell_streams=True)
+    island.add_populations(population(), default_animal_parameters_copy())
+    tile = Tile(island, 1, 2, default_animal_parameters_copy())
+    assert set(vars(island)) <= set(vars(tile))
+    species = ['Herbivore', 'Carnivore']
+    out = np.full((2, 2, 6), -1)
+    assert tile.density(species, out=out) is out
+    assert (out == island.density(species)[:, 1:3]).all()
+    assert (tile.density(species) == out).all()
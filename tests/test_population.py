@@ -0,0 +1,194 @@
+from biosim.parameters import default_animal_parameters_copy, default_land_parameters_copy
+from biosim.landscape import Landscape
+from biosim.population import PopulationLandscape, Population
+from biosim.herbivore import Herbivore
+from biosim.simulation import BioSim
+from humans.human import Human
+from humans.parameters import default_human_parameters
+import numpy as np
+import pytest
+
+
+class TestPopulation:
+
+    @pytest.fixture(autouse=True)
+    def cells(self):
+        self.para_land = default_land_parameters_copy()
+        self.para_animal = default_animal_parameters_copy()
+
+        self.water = PopulationLandscape('W', self.para_land)
+        self.lowland = PopulationLandscape('L', self.para_land)
+        self.highland = PopulationLandscape('H', self.para_land)
+
+        self.n_herbs = 20
+        self.n_carns = 18
+        self.ini_herbs = [{'species': 'Herbivore', 'age': 5, 'weight': 25}
+                          for _ in range(self.n_herbs)]
+        self.ini_carns = [{'species': 'Carnivore', 'age': 5, 'weight': 30}
+                          for _ in range(self.n_carns)]
+
+    def test_count_species(self):
+        self.highland.add_population(self.ini_herbs + self.ini_carns, self.para_animal)
+        assert self.highland.get_count_of_species('Herbivore') == self.n_herbs
+        assert self.highland.get_count_of_species('Carnivore') == self.n_carns
+        assert len(self.highland.animals) == self.n_herbs + self.n_carns
+
+    def test_add_illegal_animals(self):
+        with pytest.raises(ValueError):
+            self.highland.add_population([{'species': 'Herbivore', 'age': -1, 'weight': 20}],
+                                         self.para_animal)
+        with pytest.raises(ValueError):
+            self.water.add_population(self.ini_herbs, self.para_animal)
+
+    def test_fitness_matches_animal(self):
+        self.highland.add_population(self.ini_herbs, self.para_animal)
+        herbivore = Herbivore(5, 25, self.para_animal['Herbivore'])
+        assert self.highland.species_fitness('Herbivore')[0] == pytest.approx(herbivore.fitness)
+
+    def test_only_dirty_fitness_updated(self):
+        population = Population()
+        population.add(self.ini_herbs, self.para_animal)
+        assert population.dirty.all()
+        population.update_fitness()
+        assert not population.dirty.any()
+        population.fitness[0] = -1  # Kept, since the animal did not change
+        population.weight[1] += 10
+        population.dirty[1] = True
+        population.update_fitness()
+        assert population.fitness[0] == -1
+        assert population.fitness[1] > population.fitness[2]
+        population.ageing()
+        assert population.dirty.all()
+
+    def test_grazing_allocation(self):
+        """ The first animals eat F, the next one eats the remainder, the rest nothing """
+        population = Population()
+        population.add(self.ini_herbs, self.para_animal)
+        para = self.para_animal['Herbivore']
+        members = np.arange(len(population))
+        eaten = Herbivore.feed_population(para, population, members, 2.5 * para['F'], None)
+        assert eaten == 2.5 * para['F']
+        gain = population.weight - 25
+        assert gain[:3] == pytest.approx([para['F'] * para['beta']] * 2
+                                         + [0.5 * para['F'] * para['beta']])
+        assert not gain[3:].any()
+
+    def test_animal_feeding_weightgain(self):
+        self.para_land['H']['f_max'] = 10.5 * self.para_animal['Herbivore']['F']
+        self.highland.add_population(self.ini_herbs, self.para_animal)
+        pre_weight = sum(self.highland.species_weights('Herbivore'))
+        self.highland.animal_feeding()
+        new_weight = sum(self.highland.species_weights('Herbivore'))
+        gain_factor = self.para_land['H']['f_max'] * self.para_animal['Herbivore']['beta']
+        assert new_weight == pytest.approx(pre_weight + gain_factor)
+
+    def test_carnivores_eat_prey(self):
+        self.para_animal['Carnivore']['DeltaPhiMax'] = 0.01
+        self.para_animal['Carnivore']['w_half'] = 0
+        self.highland.add_population(self.ini_herbs + self.ini_carns, self.para_animal)
+        self.highland.animal_feeding()
+        assert self.highland.get_count_of_species('Herbivore') < self.n_herbs
+        assert self.highland.get_count_of_species('Carnivore') == self.n_carns
+        assert sum(self.highland.species_weights('Carnivore')) > 30 * self.n_carns
+
+    def test_animal_breeding(self):
+        self.para_animal['Herbivore']['zeta'] = 1
+        self.highland.add_population(self.ini_herbs, self.para_animal)
+        self.highland.animal_breeding()
+        assert self.highland.get_count_of_species('Herbivore') > self.n_herbs
+        assert 0 in self.highland.species_ages('Herbivore')
+
+    def test_animal_migration(self):
+        self.para_animal['Herbivore']['mu'] = 1
+        self.highland.add_population(self.ini_herbs, self.para_animal)
+        self.highland.animal_migration([self.lowland, self.water])
+        assert len(self.water.incoming_animals) == 0
+        assert len(self.lowland.animals) == 0
+        self.lowland.finish_animal_migration()
+        assert 0 < len(self.lowland.animals) < self.n_herbs
+        assert len(self.highland.animals) + len(self.lowland.animals) == self.n_herbs
+
+    def test_ageing_and_weight_loss(self):
+        self.highland.add_population(self.ini_herbs, self.para_animal)
+        self.highland.animal_ageing()
+        self.highland.animal_weight_loss()
+        assert self.highland.species_ages('Herbivore') == [6] * self.n_herbs
+        loss_factor = 1 - self.para_animal['Herbivore']['eta']
+        assert self.highland.species_weights('Herbivore') == pytest.approx(
+            [25 * loss_factor] * self.n_herbs)
+
+    def test_animal_death(self):
+        self.highland.add_population([{'species': 'Herbivore', 'age': 50, 'weight': 0.1},
+                                      {'species': 'Herbivore', 'age': 0, 'weight': 300}],
+                                     self.para_animal)
+        self.para_animal['Herbivore']['omega'] = 1
+        self.highland.animal_death()
+        assert self.highland.get_count_of_species('Herbivore') == 1
+
+    def test_end_of_year_matches_phases(self):
+        population = [{'species': 'Herbivore', 'age': age, 'weight': 10 + age}
+                      for age in range(40)] + self.ini_carns
+        phases, fused = (PopulationLandscape('H', self.para_land, np.random.default_rng(3))
+                         for _ in range(2))
+        for cell in phases, fused:
+            cell.add_population(population, self.para_animal)
+        phases.animal_ageing()
+        phases.animal_weight_loss()
+        phases.animal_death()
+        weight = fused.animals.weight
+        fused.animal_end_of_year()
+        assert 0 < len(fused.animals) < len(population)
+        assert fused.animals.weight.base is weight
+        assert fused.species_counts() == phases.species_counts()
+        for species in 'Herbivore', 'Carnivore':
+            assert fused.species_ages(species) == phases.species_ages(species)
+            assert fused.species_weights(species) == phases.species_weights(species)
+
+    def test_counts_follow_changes(self):
+        population = Population()
+        population.add(self.ini_herbs + self.ini_carns, self.para_animal)
+        assert population.species_counts() == {'Herbivore': self.n_herbs,
+                                               'Carnivore': self.n_carns}
+        population.keep(np.arange(len(population)) % 2 == 0)
+        part = population.subset(population.species == 0)
+        assert population.counts.tolist() == np.bincount(population.species).tolist()
+        assert part.count('Herbivore') == self.n_herbs // 2
+        assert part.count('Carnivore') == 0
+
+    def test_young_humans_infertile(self):
+        para = default_human_parameters['Human']
+        fertile = Human.fertile(para,
+                                np.array([para['BirthAge_min'] - 1, para['BirthAge_min']]),
+                                np.array([1000., 1000.]))
+        assert fertile.tolist() == [False, True]
+
+
+def test_arrays_backend_simulates():
+    sim = BioSim(island_map="WWWW\nWLHW\nWWWW",
+                 ini_pop=[{'loc': (2, 2),
+                           'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                   for _ in range(50)]}],
+                 seed=1, vis_years=0, backend='arrays')
+    sim.simulate(10)
+    assert sim.num_animals_per_species['Herbivore'] > 0
+    assert sim.num_animals_per_cell_per_species['Herbivore'][(2, 3)] > 0
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        BioSim(island_map="WWW\nWLW\nWWW", ini_pop=[], seed=1, vis_years=0, backend='gpu')
+
+
+@pytest.mark.parametrize('cell_type', [Landscape, PopulationLandscape])
+def test_births_without_weight_aborted(cell_type):
+    """ Both backends abort a birth whose drawn weight is zero or negative """
+    para_animal = default_animal_parameters_copy()
+    para_animal['Herbivore'].update(w_birth=0.0, sigma_birth=5.0, zeta=0.1, gamma=1.0)
+    cell = cell_type('L', default_land_parameters_copy(), np.random.default_rng(2))
+    cell.add_population([{'species': 'Herbivore', 'age': 5, 'weight': 40}] * 200, para_animal)
+    cell.animal_breeding()
+    newborn = [w for age, w in zip(cell.species_ages('Herbivore'),
+                                   cell.species_weights('Herbivore')) if age == 0]
+    # About half of the draws are negative
+    assert 40 < len(newborn) < 160
+    assert min(newborn) > 0
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from biosim.recorder import Recorder, load_recording
+from biosim.simulation import BioSim
+
+
+@pytest.fixture
+def sim():
+    return BioSim(island_map="WWWWW\nWLHLW\nWLLDW\nWWWWW",
+                  ini_pop=[{'loc': (2, 2),
+                            'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                    for _ in range(40)]
+                            + [{'species': 'Carnivore', 'age': 5, 'weight': 20}
+                               for _ in range(10)]}],
+                  seed=12, vis_years=0)
+
+
+def test_recording_matches_census(sim, tmp_path):
+    """ Every year is recorded, across chunks, as the simulation reports it """
+    path = tmp_path / 'run.npz'
+    sim.start_recording(path, hist_specs={'age': {'max': 20, 'delta': 2}}, chunk_years=4)
+    counts, cells, ages = [], [], []
+    for _ in range(10):
+        sim.simulate(1)
+        counts.append(sim.num_animals_per_species)
+        cells.append(sim.num_animals_per_cell_per_species)
+        ages.append(sim.ages_per_species)
+    sim.stop_recording()
+
+    recording = load_recording(path)
+    assert recording['species'] == ['Herbivore', 'Carnivore']
+    assert recording['year'].tolist() == list(range(11))
+    assert recording['counts'][0].tolist() == [40, 10]
+    assert recording['bins_age'].tolist() == list(range(0, 21, 2))
+    for year in range(1, 11):
+        for column, species in enumerate(recording['species']):
+            assert recording['counts'][year, column] == counts[year - 1][species]
+            density = recording['density'][year, column]
+            assert {(row + 1, col + 1): count for (row, col), count in np.ndenumerate(density)} \
+                == cells[year - 1][species]
+            histogram = np.histogram(ages[year - 1][species], recording['bins_age'])[0]
+            assert recording['hist_age'][year, column].tolist() == histogram.tolist()
+
+
+def test_years_are_buffered(sim, tmp_path):
+    path = tmp_path / 'run.npz'
+    recorder = sim.start_recording(path, chunk_years=5)
+    sim.simulate(3)
+    assert recorder.chunks == 0
+    sim.simulate(2)
+    assert recorder.chunks == 1
+    assert len(load_recording(path)['year']) == 5
+
+
+def test_closed_recorder(tmp_path):
+    recorder = Recorder(tmp_path / 'run.npz', ['Herbivore'], (2, 2))
+    recorder.close()
+    with pytest.raises(RuntimeError):
+        recorder.record(None)
+
+
+def test_unknown_histogram(tmp_path):
+    with pytest.raises(ValueError):
+        Recorder(tmp_path / 'run.npz', ['Herbivore'], (2, 2), {'height': {'max': 2, 'delta': 1}})
@@ -1,5 +1,13 @@
 
 import pytest
+import random
+import os
+import pickle
+import subprocess
+import sys
+import numpy as np
+import biosim
+import biosim.graphics
 from biosim.simulation import BioSim
 
 
@@ -23,6 +31,12 @@ class TestBioSim:
         with pytest.raises(ValueError):
             self.sim.set_landscape_parameters('L', {'stigma': 123})
 
+    def test_headless_has_no_graphics(self):
+        assert self.sim.graphing is None
+        self.sim.simulate(2)
+        with pytest.raises(RuntimeError):
+            self.sim.make_movie()
+
     def test_set_invalid_param_value(self):
         with pytest.raises(ValueError):
             self.sim.set_animal_parameters('Herbivore', {'F': -20})
@@ -30,3 +44,206 @@ class TestBioSim:
             self.sim.set_animal_parameters('Herbivore', {'eta': 2})
         with pytest.raises(ValueError):
             self.sim.set_landscape_parameters('L', {'f_max': -3})
+
+
+@pytest.fixture
+def populated_sim_args():
+    return dict(island_map="WWWWW\nWLHLW\nWLLDW\nWWWWW",
+                ini_pop=[{'loc': (2, 2),
+                          'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                  for _ in range(40)]
+                          + [{'species': 'Carnivore', 'age': 5, 'weight': 20}
+                             for _ in range(10)]}],
+                seed=12, vis_years=0)
+
+
+@pytest.mark.parametrize('backend', ['objects', 'arrays'])
+def test_reproducible_with_seed(populated_sim_args, backend):
+    """ The simulation owns its random generator, other use of random has no effect """
+    counts = []
+    for other_seed in [1, 2]:
+        random.seed(other_seed)
+        np.random.seed(other_seed)
+        sim = BioSim(**populated_sim_args, backend=backend)
+        sim.simulate(15)
+        counts.append(sim.num_animals_per_cell_per_species)
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.parametrize('backend', ['objects', 'arrays'])
+def test_split_simulation_continues(populated_sim_args, backend):
+    """ Simulating in two calls gives the same result as a single call """
+    whole = BioSim(**populated_sim_args, backend=backend)
+    whole.simulate(12)
+    split = BioSim(**populated_sim_args, backend=backend)
+    split.simulate(5)
+    split.simulate(7)
+    assert whole.num_animals_per_cell_per_species == split.num_animals_per_cell_per_species
+
+
+@pytest.mark.parametrize('backend', ['objects', 'arrays'])
+def test_snapshot_matches_properties(populated_sim_args, backend):
+    """ The single pass snapshot holds the same data as the per species properties """
+    sim = BioSim(**populated_sim_args, backend=backend)
+    sim.simulate(6)
+    snapshot = sim.snapshot()
+    assert snapshot.year == 6
+    assert snapshot.counts == sim.num_animals_per_species
+    assert snapshot.num_animals == sim.num_animals
+    for species, cells in sim.num_animals_per_cell_per_species.items():
+        assert snapshot.cell_counts(species) == cells
+        assert snapshot.density[species].shape == (4, 5)
+        assert sorted(snapshot.age[species]) == sorted(sim.ages_per_species[species])
+        assert sorted(snapshot.weight[species]) == pytest.approx(
+            sorted(sim.weights_per_species[species]))
+        assert sorted(snapshot.fitness[species]) == pytest.approx(
+            sorted(sim.fitness_per_species[species]))
+
+
+def test_headless_does_not_import_matplotlib():
+    """ Checked in a fresh interpreter, since other tests import matplotlib """
+    code = ("import sys\n"
+            "from biosim.simulation import BioSim\n"
+            "BioSim(island_map='WWW\\nWLW\\nWWW', ini_pop=[], seed=1, vis_years=0).simulate(2)\n"
+            "assert 'matplotlib' not in sys.modules\n")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(biosim.__file__)))
+    subprocess.run([sys.executable, '-c', code], check=True, env=env)
+
+
+def test_profiling_records_phases(populated_sim_args, tmp_path):
+    sim = BioSim(**populated_sim_args)
+    sim.simulate(2)
+    profiler = sim.enable_profiling(hot_cells=2)
+    sim.simulate(3)
+    assert [record['year'] for record in profiler.records] == [3, 4, 5]
+    record = profiler.records[-1]
+    assert set(record['phases']) == set(profiler.phases)
+    assert record['animals']['end_of_year'] == sim.num_animals
+    assert record['seconds'] >= sum(record['phases'].values())
+    assert len(record['hot_cells']) == 2
+    assert record['hot_cells'][0]['seconds'] >= record['hot_cells'][1]['seconds']
+    profiler.write_json(tmp_path / 'profile.json')
+    assert (tmp_path / 'profile.json').stat().st_size > 0
+
+
+@pytest.mark.parametrize('backend', ['objects', 'arrays'])
+def test_checkpoint_continues_identically(populated_sim_args, backend, tmp_path):
+    """ A restored simulation continues exactly like one that never stopped """
+    whole = BioSim(**populated_sim_args, backend=backend)
+    whole.simulate(10)
+
+    path = tmp_path / 'sim.ckpt'
+    stopped = BioSim(**populated_sim_args, backend=backend,
+                     checkpoint_file=path, checkpoint_years=3)
+    stopped.simulate(7)
+    restored = BioSim.from_checkpoint(path, vis_years=0)
+    assert restored.year == 6
+    restored.simulate(4)
+    assert restored.num_animals_per_cell_per_species == whole.num_animals_per_cell_per_species
+    assert restored.weights_per_species == whole.weights_per_species
+
+
+def test_checkpoint_parallel(populated_sim_args, tmp_path):
+    whole = BioSim(**populated_sim_args, workers=2)
+    whole.simulate(6)
+    stopped = BioSim(**populated_sim_args, workers=2)
+    stopped.simulate(3)
+    stopped.save_checkpoint(tmp_path / 'sim.ckpt')
+    restored = BioSim.from_checkpoint(tmp_path / 'sim.ckpt', vis_years=0)
+    restored.simulate(3)
+    assert restored.num_animals_per_cell_per_species == whole.num_animals_per_cell_per_species
+    for sim in (whole, stopped, restored):
+        sim.island.close()
+
+
+def test_not_a_checkpoint(tmp_path):
+    path = tmp_path / 'other.pickle'
+    with open(path, 'wb') as file:
+        pickle.dump({'year': 3}, file)
+    with pytest.raises(ValueError):
+        BioSim.from_checkpoint(path, vis_years=0)
+
+
+def test_graphics_update_in_place(populated_sim_args):
+    """ The count graph is filled from buffers allocated for all years, artists are reused """
+    sim = BioSim(**dict(populated_sim_args, vis_years=1))
+    sim.simulate(3)
+    graphing = sim.graphing
+    line = graphing.species_population_axis['Herbivore']
+    steps = dict(graphing.histogram_steps)
+    counts = [sim.num_animals_per_species['Herbivore']]
+    sim.graphing.setup(10)
+    buffer = graphing._counts['Herbivore']
+    for _ in range(4):
+        sim.simulate(1)
+        counts.append(sim.num_animals_per_species['Herbivore'])
+    assert graphing._counts['Herbivore'] is buffer
+    assert graphing.species_population_axis['Herbivore'] is line
+    assert graphing.histogram_steps == steps
+    assert line.get_xdata().tolist() == list(range(1, 8))
+    assert line.get_ydata()[-5:].tolist() == counts
+
+
+def test_movie_streamed_to_ffmpeg(populated_sim_args, tmp_path, monkeypatch):
+    """ Raw frames go to ffmpeg, no image files are written """
+    ffmpeg = tmp_path / 'ffmpeg'
+    ffmpeg.write_text(f'#!{sys.executable}\n'
+                      'import sys\n'
+                      'frames = sys.stdin.buffer.read()\n'
+                      'with open(sys.argv[-1], "w") as movie:\n'
+                      '    movie.write(" ".join(sys.argv[1:]) + "\\n" + str(len(frames)))\n')
+    ffmpeg.chmod(0o755)
+    monkeypatch.setattr(biosim.graphics, '_FFMPEG_BINARY', str(ffmpeg))
+
+    sim = BioSim(**dict(populated_sim_args, vis_years=1), img_dir=str(tmp_path),
+                 img_base='sim', img_years=2, movie_fmt='mp4')
+    sim.simulate(6)
+    sim.make_movie()
+    assert sorted(os.listdir(tmp_path)) == ['ffmpeg', 'sim.mp4']
+    arguments, size = (tmp_path / 'sim.mp4').read_text().splitlines()
+    width, height = sim.graphing.fig.canvas.get_width_height(physical=True)
+    assert f'-f rawvideo -pix_fmt rgba -s {width}x{height}' in arguments
+    assert int(size) == 3 * width * height * 4
+
+
+def test_movie_stream_only_mp4(populated_sim_args, tmp_path):
+    with pytest.raises(ValueError):
+        BioSim(**dict(populated_sim_args, vis_years=1), img_dir=str(tmp_path),
+               img_base='sim', movie_fmt='gif')
+
+
+def test_images_rendered_by_workers(populated_sim_args, tmp_path):
+    """ Images are drawn in worker processes, with a bounded number of frames waiting """
+    sim = BioSim(**populated_sim_args, img_dir=str(tmp_path), img_base='sim', img_years=2,
+                 render_processes=2)
+    assert sim.graphing is None
+    counts = {species: [] for species in sim.animal_parameters}
+    for years in range(4):
+        for _ in range(3):
+            sim.simulate(1)
+            for species, count in sim.num_animals_per_species.items():
+                counts[species].append(count)
+        # simulate returns when the images are saved
+        assert sorted(os.listdir(tmp_path)) == [f'sim_{number:05d}.png'
+                                                for number in range(3 * (years + 1) // 2)]
+    assert {s: c.tolist() for s, c in sim.renderer.counts.items()} == counts
+
+
+def test_renderer_frames_wait(populated_sim_args, tmp_path):
+    """ At most max_pending frames wait, and they do not carry the count history """
+    sim = BioSim(**populated_sim_args, img_dir=str(tmp_path), img_base='sim',
+                 render_processes=1)
+    renderer = sim.renderer
+    renderer.setup(10)
+    submitted = []
+    renderer._submit, submit = submitted.append, renderer._submit
+    for year in range(1, 11):
+        sim.island.simulate_year()
+        sim.years_simulated += 1
+        renderer.update(sim.snapshot(attributes=False), sim.island.histograms(renderer.histograms))
+    assert all(frame.counts is None for frame in submitted)
+    for frame in submitted:
+        submit(frame)
+        assert len(renderer._pending) <= renderer.max_pending
+    renderer.close()
+    assert len(os.listdir(tmp_path)) == 10
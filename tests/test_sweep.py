@@ -0,0 +1,54 @@
+from biosim import sweep
+from biosim.sweep import Sweep
+from biosim.simulation import BioSim
+import os
+import pytest
+
+GEOGR = "WWWWW\nWLHLW\nWLLDW\nWWWWW"
+INI_POP = [{'loc': (2, 2),
+            'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)]
+            + [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(5)]}]
+
+
+def test_grid():
+    points = Sweep.grid({('Herbivore', 'zeta'): [2, 3], ('L', 'f_max'): [500, 600, 700]})
+    assert len(points) == 6
+    assert points[0] == {('Herbivore', 'zeta'): 2, ('L', 'f_max'): 500}
+
+
+def test_runs_match_biosim():
+    point = {('Herbivore', 'F'): 20.0, ('L', 'f_max'): 500.0}
+    result, = Sweep(GEOGR, INI_POP).run([point], seeds=[4, 5], num_years=6, processes=2)
+    sim = BioSim(GEOGR, INI_POP, seed=5, vis_years=0)
+    sim.set_animal_parameters('Herbivore', {'F': 20.0})
+    sim.set_landscape_parameters('L', {'f_max': 500.0})
+    sim.simulate(6)
+    assert result.counts[1, -1].tolist() == list(sim.num_animals_per_species.values())
+
+
+def test_cache_reused(tmp_path, monkeypatch):
+    points = Sweep.grid({('Carnivore', 'F'): [30.0, 60.0]})
+    first = Sweep(GEOGR, INI_POP, cache_dir=tmp_path).run(points, [1, 2], 8, processes=1)
+    assert len(os.listdir(tmp_path)) == 4
+
+    def fail(task):
+        raise AssertionError("Cached run simulated again")
+
+    monkeypatch.setattr(sweep, '_run_point', fail)
+    again = Sweep(GEOGR, INI_POP, cache_dir=tmp_path).run(points, [2, 1], 5, processes=1)
+    assert again[1].counts[0].tolist() == first[1].counts[1, :6].tolist()
+
+
+def test_invalid_point():
+    with pytest.raises(ValueError):
+        Sweep(GEOGR, INI_POP).run([{('Herbivore', 'eta'): 2}], [1], 3, processes=1)
+
+
+def test_parameters_changed_after_construction(tmp_path):
+    """ Runs use the parameters of the sweep when run, which also key the cache """
+    changed = Sweep(GEOGR, INI_POP, cache_dir=tmp_path)
+    changed.animal_parameters['Herbivore']['F'] = 20.0
+    result, = changed.run([{('L', 'f_max'): 500.0}], [3], 6, processes=1)
+    point = {('Herbivore', 'F'): 20.0, ('L', 'f_max'): 500.0}
+    expected, = Sweep(GEOGR, INI_POP).run([point], [3], 6, processes=1)
+    assert result.counts.tolist() == expected.counts.tolist()